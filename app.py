@@ -35,6 +35,14 @@ render_mapping_ui()
 from views.data_migration_ui import render_data_migration_ui
 render_data_migration_ui()
 
+# 一括データ移行UIの描画 (複数マッピングを外部キーの順序で並行移行)
+from views.batch_migration_ui import render_batch_migration_ui
+render_batch_migration_ui()
+
+# バックグラウンドジョブUIの描画 (画面の再実行とは独立して実行中のデータ移行の進捗・キャンセル)
+from views.jobs_ui import render_jobs_ui
+render_jobs_ui()
+
 # --- メインの実行ブロック ---
 # 通常のPythonスクリプトとして実行された場合の処理 (今回はStreamlitアプリなので直接は使用しないことが多い)
 # if __name__ == "__main__":
@@ -0,0 +1,198 @@
+# データ移行をバックグラウンドのワーカープールで実行するジョブマネージャー
+# Streamlit のスクリプトの実行 (再実行・ブラウザの再読み込み) とは独立したスレッドで migrate_data を実行するため、
+# 実行中にウィジェットを操作しても移行は継続し、複数のセッションから同時に移行を実行できます。
+# ジョブはプロセス内で共有され (get_job_manager)、ジョブIDで状態・進捗を取得したり、チャンクの間でキャンセルしたりできます。
+import concurrent.futures
+import datetime
+import threading
+import uuid
+from db_utils import migrate_data
+
+# 同時に実行するジョブ数のデフォルト (超えた分は待機中になる)
+DEFAULT_MAX_JOB_WORKERS = 4
+# 保持する終了済みジョブの最大数 (超えた場合は古いものから削除)
+MAX_FINISHED_JOBS = 100
+
+# ジョブの状態
+JOB_STATUSES = ("queued", "running", "success", "failed", "cancelled")
+_FINISHED_STATUSES = ("success", "failed", "cancelled")
+
+
+class JobManager:
+    """migrate_data をワーカープールで実行し、ジョブの状態・進捗・結果を保持します。
+    ジョブの情報は複数のスレッド (ワーカー・Streamlit の各セッション) から参照されるため、ロックで保護します。
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_JOB_WORKERS):
+        self.max_workers = max_workers
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="migration_job")
+        self._jobs = {} # ジョブID -> ジョブの辞書 (投入順)
+        self._lock = threading.Lock()
+
+    def submit_migration(
+        self, name, source_engine, target_engine, source_table, target_table, column_map, **migration_options
+    ):
+        """データ移行のジョブを投入します。
+
+        Args:
+            name (str): ジョブの表示名 (マッピング名など)。
+            source_engine (sqlalchemy.engine.Engine): ソースデータベースのエンジン。
+            target_engine (sqlalchemy.engine.Engine): ターゲットデータベースのエンジン。
+            source_table (str): ソーステーブル名。
+            target_table (str): ターゲットテーブル名。
+            column_map (dict): {"ソースカラム名": "ターゲットカラム名", ...} の形式の辞書。
+            **migration_options: migrate_data に渡すオプション (chunksize, write_method, workers など)。
+                progress_callback・cancel_event・stats はジョブマネージャーが指定します。
+
+        Returns:
+            str: ジョブID。
+        """
+        job_id = uuid.uuid4().hex[:12]
+        job = {
+            "job_id": job_id,
+            "name": name,
+            "source_table": source_table,
+            "target_table": target_table,
+            "status": "queued",
+            "submitted_at": datetime.datetime.now(),
+            "started_at": None,
+            "finished_at": None,
+            "progress": None, # 最新の進捗 (migrate_data の progress_callback の引数)
+            "cancel_requested": False,
+            "message": None,
+            "stats": {},
+            "cancel_event": threading.Event(),
+            "future": None,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._prune_finished_jobs()
+        job["future"] = self._executor.submit(
+            self._run_migration, job, source_engine, target_engine, source_table, target_table, column_map, migration_options
+        )
+        return job_id
+
+    def _run_migration(self, job, source_engine, target_engine, source_table, target_table, column_map, migration_options):
+        """ワーカースレッドでデータ移行を実行し、結果をジョブに記録します。"""
+        with self._lock:
+            if job["cancel_event"].is_set(): # 待機中にキャンセルされた
+                job.update({"status": "cancelled", "finished_at": datetime.datetime.now(), "message": "開始前にキャンセルされました。"})
+                return
+            job.update({"status": "running", "started_at": datetime.datetime.now()})
+
+        def on_progress(progress):
+            with self._lock:
+                job["progress"] = progress
+
+        try:
+            success, message = migrate_data(
+                source_engine,
+                target_engine,
+                source_table,
+                target_table,
+                column_map,
+                progress_callback=on_progress,
+                cancel_event=job["cancel_event"],
+                stats=job["stats"],
+                **migration_options,
+            )
+        except Exception as e: # migrate_data は通常 (False, メッセージ) を返すが、念のためジョブを失敗として記録する
+            success, message = False, f"データ移行中にエラーが発生しました: {e}"
+        with self._lock:
+            if success:
+                status = "success"
+            elif job["stats"].get("cancelled"):
+                status = "cancelled"
+            else:
+                status = "failed"
+            job.update({"status": status, "finished_at": datetime.datetime.now(), "message": message})
+
+    def _prune_finished_jobs(self):
+        """終了済みジョブが MAX_FINISHED_JOBS を超えた場合、古いものから削除します (ロック取得済みで呼び出す)。"""
+        finished_ids = [job_id for job_id, job in self._jobs.items() if job["status"] in _FINISHED_STATUSES]
+        for job_id in finished_ids[:max(0, len(finished_ids) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+    @staticmethod
+    def _snapshot(job):
+        """ジョブの辞書から、呼び出し元に返す情報 (スレッド制御用のオブジェクトを除いた複製) を作成します。"""
+        snapshot = {key: value for key, value in job.items() if key not in ("cancel_event", "future", "stats")}
+        snapshot["stats"] = dict(job["stats"])
+        if job["progress"] is not None:
+            snapshot["progress"] = dict(job["progress"])
+        return snapshot
+
+    def get_job(self, job_id):
+        """ジョブの状態・進捗・結果を取得します。
+
+        Args:
+            job_id (str): ジョブID。
+
+        Returns:
+            dict or None: ジョブの情報 (status, progress, message, stats など)。見つからない場合は None。
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._snapshot(job) if job else None
+
+    def list_jobs(self):
+        """すべてのジョブの情報を投入日時の新しい順に取得します。
+
+        Returns:
+            list: ジョブの情報の辞書のリスト。
+        """
+        with self._lock:
+            return [self._snapshot(job) for job in reversed(self._jobs.values())]
+
+    def cancel(self, job_id):
+        """ジョブのキャンセルを要求します。
+        実行中のジョブは書き込み中のチャンクのコミット後に中止され、待機中のジョブは開始されません。
+
+        Args:
+            job_id (str): ジョブID。
+
+        Returns:
+            tuple: (bool, str) キャンセルを要求できたかどうかとメッセージ。
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return False, f"ジョブ '{job_id}' が見つかりません。"
+            if job["status"] in _FINISHED_STATUSES:
+                return False, f"ジョブ '{job['name']}' は既に終了しています。"
+            job["cancel_event"].set()
+            job["cancel_requested"] = True
+            if job["status"] == "queued" and job["future"] is not None and job["future"].cancel():
+                job.update({"status": "cancelled", "finished_at": datetime.datetime.now(), "message": "開始前にキャンセルされました。"})
+                return True, f"ジョブ '{job['name']}' をキャンセルしました。"
+        return True, f"ジョブ '{job['name']}' のキャンセルを要求しました (書き込み中のチャンクの完了後に中止します)。"
+
+    def clear_finished_jobs(self):
+        """終了済みのジョブを一覧から削除します。
+
+        Returns:
+            int: 削除したジョブの数。
+        """
+        with self._lock:
+            finished_ids = [job_id for job_id, job in self._jobs.items() if job["status"] in _FINISHED_STATUSES]
+            for job_id in finished_ids:
+                del self._jobs[job_id]
+            return len(finished_ids)
+
+
+# モジュールはプロセス内で1度だけ読み込まれるため、Streamlit の全セッションで共有されます。
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """プロセス内で共有のジョブマネージャーを取得します (初回は作成します)。
+
+    Returns:
+        JobManager: ジョブマネージャー。
+    """
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = JobManager()
+        return _job_manager
@@ -0,0 +1,869 @@
+# メタデータDB (SQLite) へのアクセスを担当するモジュール
+# カラムマッピング設定・保存済み接続情報・データ移行のチェックポイントと実行履歴を保存します。
+# Streamlit の複数セッションから同時に読み書きされることを前提に、以下の設定で接続します。
+#   - WALジャーナル: 読み込みが書き込みにブロックされない
+#   - busy_timeout: 他のセッションの書き込み中はエラーにせず待機する
+#   - foreign_keys: ON DELETE CASCADE などの外部キー制約を有効にする (SQLiteの既定では無効)
+# スキーマは PRAGMA user_version で管理し、バージョンごとのマイグレーションを順に適用します。
+import contextlib # 書き込みトランザクションのコンテキストマネージャに使用
+import datetime # チェックポイントのキー値・ウォーターマークの日時型の保存に使用
+import json # チェックポイントのキー値・ウォーターマークの保存に使用
+import os # SQLiteのファイルパスの正規化 (メタデータストアの共有キー) に使用
+import threading # メタデータストアの生成をスレッド間で排他するために使用
+import weakref # エンジンごとのメタデータストアの登録 (エンジンの破棄を妨げない) に使用
+from sqlalchemy import event, text
+
+# 他のセッションの書き込みが完了するまで待機する最大時間 (ミリ秒)
+BUSY_TIMEOUT_MS = 5000
+
+
+def _encode_stored_key(value):
+    """チェックポイントのキー値やウォーターマークをJSON文字列に変換します (日時型は型情報付きで保存)。"""
+    if value is None:
+        return None
+    if isinstance(value, (datetime.datetime, datetime.date)): # pandas.Timestamp も datetime のサブクラス
+        return json.dumps({"datetime": value.isoformat()})
+    if hasattr(value, "item"): # numpy のスカラー (numpy.int64 など)
+        value = value.item()
+    return json.dumps(value, default=str)
+
+
+def _decode_stored_key(value):
+    """_encode_stored_key で保存したJSON文字列を元の値に戻します。"""
+    if value is None:
+        return None
+    decoded = json.loads(value)
+    if isinstance(decoded, dict) and "datetime" in decoded:
+        return datetime.datetime.fromisoformat(decoded["datetime"])
+    return decoded
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """新しいSQLite接続ごとに、同時アクセスと外部キー制約のための PRAGMA を設定します。"""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL") # インメモリDBでは 'memory' のまま (エラーにはならない)
+        cursor.execute("PRAGMA synchronous=NORMAL") # WALでは NORMAL でもコミット済みのデータは失われない
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    finally:
+        cursor.close()
+
+
+def _ensure_sqlite_pragmas(dbapi_connection, connection_record, connection_proxy):
+    """接続の貸し出し時に、その接続に PRAGMA が未設定であれば設定します (checkout イベント)。
+    connect イベントと異なり、リスナーの登録前に作成されてプールに残っている接続にも適用できるため、
+    他のセッションと共有している接続プールを破棄せずに済みます。
+    """
+    if connection_record.info.get("metadata_store_pragmas"):
+        return
+    _set_sqlite_pragmas(dbapi_connection, connection_record)
+    connection_record.info["metadata_store_pragmas"] = True
+
+
+class _ListingCache:
+    """マッピング設定名・接続設定名の一覧と接続情報のキャッシュです。データベースごとに1つ作成し、
+    同じデータベースの全てのエンジン (接続プールの設定が異なるものなど) の MetadataStore で共有します。
+    エンジンへの参照は持たないため、登録されたままでもエンジンの破棄を妨げません。
+    """
+
+    def __init__(self):
+        self.values = {} # (種別, ...) -> 一覧・接続情報
+        self.generation = 0 # キャッシュを破棄するたびに増やす (読み込み中に破棄された古い値を格納しないため)
+        self.lock = threading.Lock()
+        self.schema_ready = False # このプロセスでスキーママイグレーションを適用済みの場合 True
+
+
+# --- スキーママイグレーション ---
+# (バージョン, 適用する関数) のタプル。関数は書き込みトランザクション内の Connection を受け取ります。
+# 新しいマイグレーションは末尾に追加し、既存のものは変更しないでください。
+
+def _migration_1_create_tables(connection):
+    """メタデータテーブルを作成します (PRAGMA user_version 導入前に作成されたDBにも適用できるよう IF NOT EXISTS を使用)。"""
+    # カラムマッピング設定のヘッダー情報を保存するテーブル
+    connection.execute(text("""
+        CREATE TABLE IF NOT EXISTS mapping_configs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, -- 自動採番の主キー
+            name TEXT UNIQUE NOT NULL,            -- マッピング設定名 (ユニーク)
+            source_db_url TEXT,                   -- ソースDBの接続URL (参考情報)
+            target_db_url TEXT,                   -- ターゲットDBの接続URL (参考情報)
+            source_table TEXT NOT NULL,           -- ソーステーブル名
+            target_table TEXT NOT NULL,           -- ターゲットテーブル名
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, -- 作成日時
+            watermark_column TEXT,                -- 差分移行に使用するソースのウォーターマークカラム (任意)
+            watermark_value TEXT                  -- 前回の移行で記録したウォーターマーク (JSON)
+        )
+    """))
+    # 以前のバージョンで作成されたテーブルに、後から追加されたカラムを追加
+    mapping_config_columns = {row[1] for row in connection.execute(text("PRAGMA table_info(mapping_configs)"))}
+    for column_name in ("watermark_column", "watermark_value"):
+        if column_name not in mapping_config_columns:
+            connection.execute(text(f"ALTER TABLE mapping_configs ADD COLUMN {column_name} TEXT"))
+    # 保存された接続情報を格納するテーブル
+    connection.execute(text("""
+        CREATE TABLE IF NOT EXISTS saved_connections (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL,
+            db_type TEXT NOT NULL,
+            host TEXT,
+            port TEXT,
+            db_name TEXT,
+            user TEXT,
+            password TEXT,
+            schema_name TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+    # 個々のカラムマッピング詳細を保存するテーブル
+    connection.execute(text("""
+        CREATE TABLE IF NOT EXISTS column_mappings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, -- 自動採番の主キー
+            config_id INTEGER NOT NULL,           -- mapping_configsテーブルへの外部キー
+            source_column TEXT NOT NULL,          -- ソースカラム名
+            target_column TEXT NOT NULL,          -- ターゲットカラム名
+            FOREIGN KEY (config_id) REFERENCES mapping_configs(id) ON DELETE CASCADE -- 親レコード削除時に子も削除
+        )
+    """))
+    # データ移行のチェックポイント (キー範囲ごとの最終コミットキーと行数) を保存するテーブル
+    connection.execute(text("""
+        CREATE TABLE IF NOT EXISTS migration_checkpoints (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id TEXT NOT NULL,                 -- 移行の実行ID
+            range_index INTEGER NOT NULL,         -- キー範囲の番号 (並列移行でない場合は0)
+            source_table TEXT NOT NULL,           -- ソーステーブル名
+            target_table TEXT NOT NULL,           -- ターゲットテーブル名
+            key_column TEXT NOT NULL,             -- 読み込み順序・再開位置に使用するソースのキーカラム
+            range_start TEXT,                     -- 範囲の開始キー (JSON、含む)
+            range_end TEXT,                       -- 範囲の終了キー (JSON、含まない。上限なしはNULL)
+            last_key TEXT,                        -- 最後にコミットしたチャンクの末尾キー (JSON)
+            rows_migrated INTEGER NOT NULL DEFAULT 0, -- この範囲で移行済みの行数
+            status TEXT NOT NULL DEFAULT 'running', -- 'running' / 'failed' / 'completed'
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, -- 最終更新日時
+            UNIQUE (run_id, range_index)
+        )
+    """))
+
+
+def _migration_2_add_indexes(connection):
+    """外部キー制約が無効だった間に残った孤立行を削除し、検索に使用するカラムにインデックスを作成します。"""
+    connection.execute(text(
+        "DELETE FROM column_mappings WHERE config_id NOT IN (SELECT id FROM mapping_configs)"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_column_mappings_config_id ON column_mappings (config_id)"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_migration_checkpoints_tables"
+        " ON migration_checkpoints (source_table, target_table, updated_at)"
+    ))
+
+
+def _migration_3_create_run_history_tables(connection):
+    """データ移行の実行履歴 (実行ごとの結果とチャンクごとの計測値) を保存するテーブルを作成します。"""
+    connection.execute(text("""
+        CREATE TABLE IF NOT EXISTS migration_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, -- 実行履歴ID
+            mapping_name TEXT,                    -- 使用したマッピング設定名 (任意)
+            source_table TEXT NOT NULL,           -- ソーステーブル名
+            target_table TEXT NOT NULL,           -- ターゲットテーブル名
+            status TEXT NOT NULL,                 -- 'success' / 'failed' / 'cancelled'
+            started_at TIMESTAMP NOT NULL,        -- 開始日時 (ローカル時刻)
+            finished_at TIMESTAMP NOT NULL,       -- 終了日時 (ローカル時刻)
+            rows INTEGER,                         -- 移行した行数
+            seconds REAL,                         -- 所要時間 (秒)
+            rows_per_sec REAL,                    -- スループット (行/秒)
+            peak_rss_mb REAL,                     -- ピークRSS (MB)
+            chunk_count INTEGER,                  -- 書き込んだチャンク数
+            chunksize INTEGER,                    -- 指定したチャンクサイズ (自動調整時は初期値)
+            write_method TEXT,                    -- 書き込み方式 (解決後)
+            data_engine TEXT,                     -- データエンジン
+            load_mode TEXT,                       -- ロードモード
+            workers INTEGER,                      -- 並列ワーカー数
+            pipeline_depth INTEGER,               -- パイプラインのキュー深さ
+            read_seconds REAL,                    -- 読み込みの合計時間 (秒)
+            transform_seconds REAL,               -- 変換 (カラム名の変更) の合計時間 (秒)
+            write_seconds REAL,                   -- 書き込みの合計時間 (秒)
+            reader_stall_seconds REAL,            -- パイプラインで読み込み側が待機した時間 (秒)
+            writer_stall_seconds REAL,            -- パイプラインで書き込み側が待機した時間 (秒)
+            checkpoint_run_id TEXT,               -- チェックポイントの実行ID (チェックポイント使用時)
+            message TEXT                          -- 結果メッセージ
+        )
+    """))
+    connection.execute(text("""
+        CREATE TABLE IF NOT EXISTS migration_chunks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            migration_run_id INTEGER NOT NULL,    -- migration_runs テーブルへの外部キー
+            chunk_index INTEGER NOT NULL,         -- 書き込み順のチャンク番号 (0から)
+            range_index INTEGER NOT NULL,         -- キー範囲の番号 (並列移行でない場合は0)
+            rows INTEGER NOT NULL,                -- チャンクの行数
+            bytes INTEGER,                        -- チャンクのメモリ上のバイト数
+            read_seconds REAL,                    -- 読み込みの所要時間 (秒)
+            transform_seconds REAL,               -- 変換の所要時間 (秒)
+            write_seconds REAL,                   -- 書き込みの所要時間 (秒)
+            rows_per_sec REAL,                    -- チャンクのスループット (行 / 読み込み〜書き込みの秒数)
+            peak_rss_mb REAL,                     -- 書き込み完了時点のピークRSS (MB)
+            finished_offset_seconds REAL,         -- 移行開始から書き込み完了までの経過時間 (秒)
+            FOREIGN KEY (migration_run_id) REFERENCES migration_runs(id) ON DELETE CASCADE
+        )
+    """))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_migration_runs_tables ON migration_runs (source_table, target_table, started_at)"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_migration_runs_mapping_name ON migration_runs (mapping_name, started_at)"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_migration_chunks_run_id ON migration_chunks (migration_run_id, chunk_index)"
+    ))
+
+
+def _migration_4_add_checkpoint_pending_key(connection):
+    """チェックポイントに、書き込み中のチャンクの末尾キー (pending_key) を記録するカラムを追加します。"""
+    connection.execute(text(
+        "ALTER TABLE migration_checkpoints ADD COLUMN pending_key TEXT" # 書き込み中 (未コミットの可能性あり) のチャンクの末尾キー (JSON)
+    ))
+
+
+_MIGRATIONS = (
+    (1, _migration_1_create_tables),
+    (2, _migration_2_add_indexes),
+    (3, _migration_3_create_run_history_tables),
+    (4, _migration_4_add_checkpoint_pending_key),
+)
+
+# 現在のスキーマバージョン
+SCHEMA_VERSION = _MIGRATIONS[-1][0]
+
+
+class MetadataStore:
+    """メタデータDB (SQLite) の読み書きを行うクラスです。
+
+    生成時に接続ごとの PRAGMA (WAL・busy_timeout・foreign_keys) を設定し、未適用のスキーママイグレーションを適用します。
+    書き込みは BEGIN IMMEDIATE で開始するため、複数のセッションが同時に書き込んでも
+    トランザクションの途中でロックの昇格に失敗せず、busy_timeout の範囲で順番に実行されます。
+    通常は get_metadata_store() でエンジンごとのインスタンスを取得して使用します。インスタンスは生成時のエンジンでのみ読み書きし
+    (他のセッションのエンジンに切り替えることはありません)、エンジンは弱参照で保持します。
+
+    マッピング設定名・接続設定名の一覧と接続情報は、画面の再描画のたびに問い合わせないようキャッシュし (_ListingCache)、
+    保存・更新・削除で実際に変更があった場合のみ破棄します。キャッシュはデータベース (正規化したURL・ファイルパス) ごとに
+    共有されるため、接続プールの設定が異なるエンジンを使用するセッションも含め、全セッションで同じキャッシュを使用します。
+    """
+
+    def __init__(self, engine, listing_cache=None):
+        """
+        Args:
+            engine (sqlalchemy.engine.Engine): メタデータDB (SQLite) のエンジン。
+            listing_cache (_ListingCache, optional): 同じデータベースのストアと共有するキャッシュ。省略時はこのストア専用に作成します。
+
+        Raises:
+            RuntimeError: スキーママイグレーションに失敗した場合。
+        """
+        self._engine_ref = weakref.ref(engine)
+        self._is_sqlite = engine.dialect.name == "sqlite"
+        self._listing = listing_cache if listing_cache is not None else _ListingCache()
+        if self._is_sqlite and not event.contains(engine, "checkout", _ensure_sqlite_pragmas):
+            event.listen(engine, "checkout", _ensure_sqlite_pragmas)
+        if not self._listing.schema_ready: # 同じデータベースで適用済みの場合は問い合わせない
+            self.migrate()
+            self._listing.schema_ready = True
+
+    @property
+    def engine(self):
+        """読み書きに使用するエンジン。
+
+        Raises:
+            RuntimeError: エンジンが破棄されている場合。
+        """
+        engine = self._engine_ref()
+        if engine is None:
+            raise RuntimeError("メタデータDBのエンジンは破棄されています。")
+        return engine
+
+    @contextlib.contextmanager
+    def _write_transaction(self):
+        """書き込みトランザクションを開始し、正常終了時にコミット、例外発生時にロールバックします。"""
+        with self.engine.connect() as connection:
+            if self._is_sqlite:
+                # 最初から書き込みロックを取得する (読み込みから書き込みへの昇格時の SQLITE_BUSY を避ける)
+                connection.exec_driver_sql("BEGIN IMMEDIATE")
+            try:
+                yield connection
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+
+    def _get_cached(self, key, loader):
+        """一覧・接続情報のキャッシュからキーの値を返します。存在しない場合は loader() で読み込んで格納します。
+        loader() が例外を送出した場合は格納せずにそのまま送出します。
+        """
+        listing = self._listing
+        with listing.lock:
+            if key in listing.values:
+                return listing.values[key]
+            generation = listing.generation
+        value = loader()
+        with listing.lock:
+            if generation == listing.generation: # 読み込み中に変更されていない場合のみ格納
+                listing.values[key] = value
+        return value
+
+    def _invalidate_listings(self, *kinds):
+        """指定した種別 ("mapping_config_names" / "connection_names" / "connection_info") のキャッシュを破棄します。"""
+        listing = self._listing
+        with listing.lock:
+            listing.generation += 1
+            for key in [key for key in listing.values if key[0] in kinds]:
+                del listing.values[key]
+
+    def schema_version(self):
+        """適用済みのスキーマバージョン (PRAGMA user_version) を返します。"""
+        with self.engine.connect() as connection:
+            return connection.exec_driver_sql("PRAGMA user_version").scalar()
+
+    def migrate(self):
+        """未適用のスキーママイグレーションを順に適用します。
+        複数のセッションが同時に呼び出しても、各マイグレーションは1度だけ適用されます。
+
+        Raises:
+            RuntimeError: マイグレーションに失敗した場合。
+        """
+        for version, migration in _MIGRATIONS:
+            try:
+                with self._write_transaction() as connection:
+                    # 書き込みロック取得後にバージョンを確認する (他のセッションが適用済みの場合はスキップ)
+                    if connection.exec_driver_sql("PRAGMA user_version").scalar() >= version:
+                        continue
+                    migration(connection)
+                    connection.exec_driver_sql(f"PRAGMA user_version = {int(version)}")
+            except Exception as e:
+                raise RuntimeError(f"メタデータDBのマイグレーション (バージョン {version}) に失敗しました: {e}")
+
+    # --- カラムマッピング設定 ---
+
+    def save_column_mapping(
+        self, mapping_name, source_db_url, target_db_url, source_table, target_table, mappings, watermark_column=None,
+    ):
+        """カラムマッピング設定を保存します。同名の設定が存在する場合は更新し、存在しない場合は新規作成します。
+        ウォーターマークカラムが変更された場合、記録済みのウォーターマークはリセットされます。
+        カラムの対応は1回の executemany でまとめて挿入します。
+
+        Returns:
+            tuple: (bool, str) 保存の成否とメッセージ。
+        """
+        watermark_column = watermark_column or None # 空文字は未設定として扱う
+        try:
+            with self._write_transaction() as connection:
+                # 既存のマッピング設定を名前で検索
+                result = connection.execute(
+                    text("SELECT id FROM mapping_configs WHERE name = :name"), {"name": mapping_name},
+                ).fetchone()
+                config_params = {
+                    "source_db_url": source_db_url,
+                    "target_db_url": target_db_url,
+                    "source_table": source_table,
+                    "target_table": target_table,
+                    "watermark_column": watermark_column,
+                }
+                if result: # 既存設定がある場合
+                    config_id = result[0]
+                    # 既存のカラムマッピング詳細を一度削除 (更新のため)
+                    connection.execute(
+                        text("DELETE FROM column_mappings WHERE config_id = :config_id"), {"config_id": config_id},
+                    )
+                    # mapping_configs テーブルのレコードを更新 (URLやテーブル名が変わる可能性があるため)
+                    connection.execute(
+                        text("""
+                            UPDATE mapping_configs
+                            SET source_db_url = :source_db_url, target_db_url = :target_db_url,
+                                source_table = :source_table, target_table = :target_table,
+                                watermark_value = CASE WHEN watermark_column IS :watermark_column
+                                                       THEN watermark_value ELSE NULL END,
+                                watermark_column = :watermark_column
+                            WHERE id = :config_id
+                        """),
+                        {**config_params, "config_id": config_id},
+                    )
+                else: # 新規作成の場合
+                    cursor_result = connection.execute(
+                        text("""
+                            INSERT INTO mapping_configs (name, source_db_url, target_db_url, source_table, target_table, watermark_column)
+                            VALUES (:name, :source_db_url, :target_db_url, :source_table, :target_table, :watermark_column)
+                        """),
+                        {**config_params, "name": mapping_name},
+                    )
+                    config_id = cursor_result.lastrowid # 挿入されたレコードのIDを取得
+
+                # ソースとターゲットの両カラム名が存在する対応のみを保存
+                mapping_rows = [
+                    {"config_id": config_id, "source_column": src_col, "target_column": tgt_col}
+                    for src_col, tgt_col in mappings.items()
+                    if src_col and tgt_col
+                ]
+                if mapping_rows:
+                    connection.execute(
+                        text("""
+                            INSERT INTO column_mappings (config_id, source_column, target_column)
+                            VALUES (:config_id, :source_column, :target_column)
+                        """),
+                        mapping_rows, # パラメータのリストを渡すと executemany で実行される
+                    )
+            self._invalidate_listings("mapping_config_names")
+            return True, "カラムマッピングを保存しました。"
+        except Exception as e:
+            return False, f"カラムマッピングの保存に失敗しました: {e}"
+
+    def get_mapping_config_names(self):
+        """保存されている全てのマッピング設定の名前を名前順で返します (キャッシュ)。エラー時は空リスト。"""
+        def fetch():
+            with self.engine.connect() as connection:
+                result = connection.execute(text("SELECT name FROM mapping_configs ORDER BY name"))
+                return tuple(row[0] for row in result.fetchall())
+        try:
+            return list(self._get_cached(("mapping_config_names",), fetch))
+        except Exception as e:
+            print(f"マッピング設定名の取得中にエラー: {e}") # ログ出力は行う
+            return []
+
+    def load_column_mapping(self, mapping_name):
+        """マッピング設定 (ヘッダー情報) と詳細 (カラム対応) を1回のクエリで読み込みます。
+
+        Returns:
+            tuple: 成功時は (設定詳細辞書, カラムマッピング辞書)、失敗時または設定なしの場合は (None, None)。
+        """
+        try:
+            with self.engine.connect() as connection:
+                rows = connection.execute(
+                    text("""
+                        SELECT mc.source_db_url, mc.target_db_url, mc.source_table, mc.target_table,
+                               mc.watermark_column, mc.watermark_value, cm.source_column, cm.target_column
+                        FROM mapping_configs mc
+                        LEFT JOIN column_mappings cm ON cm.config_id = mc.id
+                        WHERE mc.name = :name
+                        ORDER BY cm.id
+                    """),
+                    {"name": mapping_name},
+                ).fetchall()
+            if not rows:
+                return None, None # 指定された名前の設定が見つからない
+            first_row = rows[0]
+            config_details = {
+                "name": mapping_name,
+                "source_db_url": first_row.source_db_url,
+                "target_db_url": first_row.target_db_url,
+                "source_table": first_row.source_table,
+                "target_table": first_row.target_table,
+                "watermark_column": first_row.watermark_column,
+                "watermark_value": _decode_stored_key(first_row.watermark_value),
+            }
+            mappings = {row.source_column: row.target_column for row in rows if row.source_column is not None}
+            return config_details, mappings
+        except Exception as e:
+            print(f"マッピング '{mapping_name}' の読み込み中にエラー: {e}") # ログ出力
+            return None, None
+
+    def update_mapping_watermark(self, mapping_name, watermark_value):
+        """マッピング設定に、差分移行で記録した最新のウォーターマークを保存します。
+
+        Returns:
+            tuple: (bool, str) 保存の成否とメッセージ。
+        """
+        try:
+            with self._write_transaction() as connection:
+                result = connection.execute(
+                    text("UPDATE mapping_configs SET watermark_value = :watermark_value WHERE name = :name"),
+                    {"watermark_value": _encode_stored_key(watermark_value), "name": mapping_name},
+                )
+                updated_rows = result.rowcount
+            if updated_rows > 0:
+                return True, f"マッピング '{mapping_name}' のウォーターマークを更新しました。"
+            return False, f"マッピング '{mapping_name}' が見つかりません。"
+        except Exception as e:
+            return False, f"マッピング '{mapping_name}' のウォーターマークの保存に失敗しました: {e}"
+
+    def delete_column_mapping(self, mapping_name):
+        """マッピング設定を削除します。カラムマッピング詳細は外部キー制約 (ON DELETE CASCADE) により削除されます。
+
+        Returns:
+            tuple: (bool, str) 削除の成否とメッセージ。
+        """
+        try:
+            with self._write_transaction() as connection:
+                result = connection.execute(
+                    text("DELETE FROM mapping_configs WHERE name = :name"), {"name": mapping_name},
+                )
+                deleted_rows = result.rowcount
+            if deleted_rows > 0: # 削除された行数を確認
+                self._invalidate_listings("mapping_config_names")
+                return True, f"マッピング '{mapping_name}' を削除しました。"
+            return False, f"マッピング '{mapping_name}' が見つかりません。"
+        except Exception as e:
+            return False, f"マッピング '{mapping_name}' の削除に失敗しました: {e}"
+
+    # --- 接続情報 ---
+
+    @staticmethod
+    def _connection_params(db_type, params):
+        """接続パラメータの辞書から saved_connections の各カラムの値を取り出します (存在しないキーは None)。"""
+        return {
+            "db_type": db_type,
+            "host": params.get("host"),
+            "port": params.get("port"),
+            "db_name": params.get("db_name"),
+            "user": params.get("user"),
+            "password": params.get("password"), # 平文で保存
+            "schema_name": params.get("schema_name"),
+        }
+
+    def save_connection_info(self, name, db_type, params):
+        """接続情報を保存します。同名の接続情報が存在する場合は更新し、存在しない場合は新規作成します。
+
+        Returns:
+            tuple: (bool, str) 保存の成否とメッセージ。
+        """
+        try:
+            with self._write_transaction() as connection:
+                connection.execute(
+                    text("""
+                        INSERT INTO saved_connections (name, db_type, host, port, db_name, user, password, schema_name)
+                        VALUES (:name, :db_type, :host, :port, :db_name, :user, :password, :schema_name)
+                        ON CONFLICT (name) DO UPDATE SET
+                            db_type = excluded.db_type, host = excluded.host, port = excluded.port,
+                            db_name = excluded.db_name, user = excluded.user, password = excluded.password,
+                            schema_name = excluded.schema_name
+                    """),
+                    {"name": name, **self._connection_params(db_type, params)},
+                )
+            self._invalidate_listings("connection_names", "connection_info")
+            return True, f"接続情報 '{name}' を保存しました。"
+        except Exception as e:
+            return False, f"接続情報 '{name}' の保存に失敗しました: {e}"
+
+    def get_connection_names(self):
+        """保存されている全ての接続設定の名前を名前順で返します (キャッシュ)。エラー時は空リスト。"""
+        def fetch():
+            with self.engine.connect() as connection:
+                result = connection.execute(text("SELECT name FROM saved_connections ORDER BY name"))
+                return tuple(row[0] for row in result.fetchall())
+        try:
+            return list(self._get_cached(("connection_names",), fetch))
+        except Exception as e:
+            print(f"接続設定名の取得中にエラー: {e}") # ログ出力は行う
+            return []
+
+    def load_connection_info(self, name):
+        """接続情報を読み込みます (キャッシュ)。見つからない場合やエラー時は None を返します。"""
+        def fetch():
+            with self.engine.connect() as connection:
+                result = connection.execute(
+                    text(
+                        "SELECT name, db_type, host, port, db_name, user, password, schema_name"
+                        " FROM saved_connections WHERE name = :name"
+                    ),
+                    {"name": name},
+                ).mappings().fetchone()
+            return dict(result) if result else None
+        try:
+            connection_info = self._get_cached(("connection_info", name), fetch)
+            return dict(connection_info) if connection_info else None # 呼び出し元での変更がキャッシュに影響しないよう複製する
+        except Exception as e:
+            print(f"接続情報 '{name}' の読み込み中にエラー: {e}") # ログ出力
+            return None
+
+    def delete_connection_info(self, name):
+        """接続情報を削除します。
+
+        Returns:
+            tuple: (bool, str) 削除の成否とメッセージ。
+        """
+        try:
+            with self._write_transaction() as connection:
+                result = connection.execute(text("DELETE FROM saved_connections WHERE name = :name"), {"name": name})
+                deleted_rows = result.rowcount
+            if deleted_rows > 0: # 削除された行数を確認
+                self._invalidate_listings("connection_names", "connection_info")
+                return True, f"接続情報 '{name}' を削除しました。"
+            return False, f"接続情報 '{name}' が見つかりません。"
+        except Exception as e:
+            return False, f"接続情報 '{name}' の削除に失敗しました: {e}"
+
+    def update_connection_info(self, original_name, new_name, db_type, params):
+        """接続情報を更新します。名前の変更も可能です。
+
+        Returns:
+            tuple: (bool, str) 更新の成否とメッセージ。
+        """
+        try:
+            with self._write_transaction() as connection:
+                # まず、元の名前の接続情報が存在するか確認
+                check_result = connection.execute(
+                    text("SELECT id FROM saved_connections WHERE name = :original_name"),
+                    {"original_name": original_name},
+                ).fetchone()
+                if not check_result:
+                    return False, f"接続情報 '{original_name}' が見つかりません。"
+
+                # 新しい名前が元の名前と異なり、かつ新しい名前が既に存在するか確認 (ユニーク制約違反を避けるため)
+                if original_name != new_name:
+                    name_check_result = connection.execute(
+                        text("SELECT id FROM saved_connections WHERE name = :new_name"), {"new_name": new_name},
+                    ).fetchone()
+                    if name_check_result:
+                        return False, f"新しい接続名 '{new_name}' は既に使用されています。"
+
+                connection.execute(
+                    text("""
+                        UPDATE saved_connections
+                        SET name = :new_name, db_type = :db_type, host = :host, port = :port,
+                            db_name = :db_name, user = :user, password = :password, schema_name = :schema_name
+                        WHERE id = :config_id
+                    """),
+                    {"new_name": new_name, "config_id": check_result[0], **self._connection_params(db_type, params)},
+                )
+            self._invalidate_listings("connection_names", "connection_info")
+            return True, f"接続情報 '{original_name}' を '{new_name}' に更新しました。"
+        except Exception as e:
+            return False, f"接続情報 '{original_name}' の更新に失敗しました: {e}"
+
+    # --- データ移行のチェックポイント ---
+
+    def save_migration_checkpoint(
+        self, run_id, range_index, source_table, target_table, key_column,
+        range_start, range_end, last_key, rows_migrated, status="running", pending_key=None,
+    ):
+        """データ移行のチェックポイントを保存します。同じ実行ID・範囲番号のチェックポイントが存在する場合は更新します。
+
+        Returns:
+            tuple: (bool, str) 保存の成否とメッセージ。
+        """
+        try:
+            with self._write_transaction() as connection:
+                connection.execute(
+                    text("""
+                        INSERT INTO migration_checkpoints (
+                            run_id, range_index, source_table, target_table, key_column,
+                            range_start, range_end, last_key, pending_key, rows_migrated, status, updated_at
+                        )
+                        VALUES (
+                            :run_id, :range_index, :source_table, :target_table, :key_column,
+                            :range_start, :range_end, :last_key, :pending_key, :rows_migrated, :status, CURRENT_TIMESTAMP
+                        )
+                        ON CONFLICT (run_id, range_index) DO UPDATE SET
+                            last_key = excluded.last_key, pending_key = excluded.pending_key,
+                            rows_migrated = excluded.rows_migrated,
+                            status = excluded.status, updated_at = excluded.updated_at
+                    """),
+                    {
+                        "run_id": run_id,
+                        "range_index": range_index,
+                        "source_table": source_table,
+                        "target_table": target_table,
+                        "key_column": key_column,
+                        "range_start": _encode_stored_key(range_start),
+                        "range_end": _encode_stored_key(range_end),
+                        "last_key": _encode_stored_key(last_key),
+                        "pending_key": _encode_stored_key(pending_key),
+                        "rows_migrated": rows_migrated,
+                        "status": status,
+                    },
+                )
+            return True, "チェックポイントを保存しました。"
+        except Exception as e:
+            return False, f"チェックポイントの保存に失敗しました (実行ID: {run_id}): {e}"
+
+    def load_migration_checkpoints(self, run_id):
+        """実行IDのチェックポイントを範囲番号順に読み込みます (キー値はデコード済み)。エラー時は空リスト。"""
+        try:
+            with self.engine.connect() as connection:
+                result = connection.execute(
+                    text("""
+                        SELECT run_id, range_index, source_table, target_table, key_column,
+                               range_start, range_end, last_key, pending_key, rows_migrated, status, updated_at
+                        FROM migration_checkpoints
+                        WHERE run_id = :run_id
+                        ORDER BY range_index
+                    """),
+                    {"run_id": run_id},
+                )
+                checkpoints = []
+                for row in result.mappings():
+                    checkpoint = dict(row)
+                    for key_name in ("range_start", "range_end", "last_key", "pending_key"):
+                        checkpoint[key_name] = _decode_stored_key(checkpoint[key_name])
+                    checkpoints.append(checkpoint)
+                return checkpoints
+        except Exception as e:
+            print(f"チェックポイント (実行ID: {run_id}) の読み込み中にエラー: {e}") # ログ出力
+            return []
+
+    def get_resumable_migration_runs(self, source_table=None, target_table=None):
+        """未完了の範囲が残っている (再開可能な) データ移行の実行を、更新日時の新しい順に返します。エラー時は空リスト。"""
+        try:
+            with self.engine.connect() as connection:
+                result = connection.execute(
+                    text("""
+                        SELECT run_id, source_table, target_table, key_column,
+                               SUM(rows_migrated) AS rows_migrated,
+                               COUNT(*) AS ranges,
+                               SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) AS completed_ranges,
+                               MAX(updated_at) AS updated_at
+                        FROM migration_checkpoints
+                        WHERE (:source_table IS NULL OR source_table = :source_table)
+                          AND (:target_table IS NULL OR target_table = :target_table)
+                        GROUP BY run_id, source_table, target_table, key_column
+                        HAVING SUM(CASE WHEN status = 'completed' THEN 0 ELSE 1 END) > 0
+                        ORDER BY MAX(updated_at) DESC
+                    """),
+                    {"source_table": source_table, "target_table": target_table},
+                )
+                return [dict(row) for row in result.mappings()]
+        except Exception as e:
+            print(f"再開可能な移行の取得中にエラー: {e}") # ログ出力
+            return []
+
+
+    # --- データ移行の実行履歴 ---
+
+    _MIGRATION_RUN_COLUMNS = (
+        "mapping_name", "source_table", "target_table", "status", "started_at", "finished_at",
+        "rows", "seconds", "rows_per_sec", "peak_rss_mb", "chunk_count", "chunksize",
+        "write_method", "data_engine", "load_mode", "workers", "pipeline_depth",
+        "read_seconds", "transform_seconds", "write_seconds", "reader_stall_seconds", "writer_stall_seconds",
+        "checkpoint_run_id", "message",
+    )
+    _MIGRATION_CHUNK_COLUMNS = (
+        "chunk_index", "range_index", "rows", "bytes", "read_seconds", "transform_seconds", "write_seconds",
+        "rows_per_sec", "peak_rss_mb", "finished_offset_seconds",
+    )
+
+    def save_migration_run(self, run, chunks):
+        """データ移行の実行結果と、チャンクごとの計測値を1つのトランザクションで保存します。
+        チャンクの計測値は1回の executemany でまとめて挿入します。
+
+        Args:
+            run (dict): 実行結果 (_MIGRATION_RUN_COLUMNS のキー。存在しないキーは NULL)。
+            chunks (list): チャンクごとの計測値の辞書のリスト (_MIGRATION_CHUNK_COLUMNS のキー)。
+
+        Returns:
+            tuple: 成功時は (True, 実行履歴ID)、失敗時は (False, エラーメッセージ)。
+        """
+        columns = self._MIGRATION_RUN_COLUMNS
+        chunk_columns = self._MIGRATION_CHUNK_COLUMNS
+        try:
+            with self._write_transaction() as connection:
+                migration_run_id = connection.execute(
+                    text(
+                        f"INSERT INTO migration_runs ({', '.join(columns)})"
+                        f" VALUES ({', '.join(':' + column for column in columns)})"
+                    ),
+                    {column: run.get(column) for column in columns},
+                ).lastrowid
+                if chunks:
+                    connection.execute(
+                        text(
+                            f"INSERT INTO migration_chunks (migration_run_id, {', '.join(chunk_columns)})"
+                            f" VALUES (:migration_run_id, {', '.join(':' + column for column in chunk_columns)})"
+                        ),
+                        [
+                            {"migration_run_id": migration_run_id, **{column: chunk.get(column) for column in chunk_columns}}
+                            for chunk in chunks
+                        ],
+                    )
+            return True, migration_run_id
+        except Exception as e:
+            return False, f"実行履歴の保存に失敗しました: {e}"
+
+    def get_migration_runs(self, mapping_name=None, source_table=None, target_table=None, limit=50):
+        """データ移行の実行履歴を開始日時の新しい順に返します。指定した条件 (None は無条件) に一致する実行のみを返します。エラー時は空リスト。"""
+        try:
+            with self.engine.connect() as connection:
+                result = connection.execute(
+                    text(f"""
+                        SELECT id, {', '.join(self._MIGRATION_RUN_COLUMNS)}
+                        FROM migration_runs
+                        WHERE (:mapping_name IS NULL OR mapping_name = :mapping_name)
+                          AND (:source_table IS NULL OR source_table = :source_table)
+                          AND (:target_table IS NULL OR target_table = :target_table)
+                        ORDER BY started_at DESC, id DESC
+                        LIMIT :limit
+                    """),
+                    {"mapping_name": mapping_name, "source_table": source_table, "target_table": target_table, "limit": limit},
+                )
+                return [dict(row) for row in result.mappings()]
+        except Exception as e:
+            print(f"実行履歴の取得中にエラー: {e}") # ログ出力
+            return []
+
+    def load_migration_chunks(self, migration_run_id):
+        """実行履歴IDのチャンクごとの計測値を書き込み順に返します。エラー時は空リスト。"""
+        try:
+            with self.engine.connect() as connection:
+                result = connection.execute(
+                    text(f"""
+                        SELECT {', '.join(self._MIGRATION_CHUNK_COLUMNS)}
+                        FROM migration_chunks
+                        WHERE migration_run_id = :migration_run_id
+                        ORDER BY chunk_index
+                    """),
+                    {"migration_run_id": migration_run_id},
+                )
+                return [dict(row) for row in result.mappings()]
+        except Exception as e:
+            print(f"実行履歴 (ID: {migration_run_id}) のチャンクの読み込み中にエラー: {e}") # ログ出力
+            return []
+
+# エンジン -> MetadataStore。ストアはエンジンを弱参照でのみ保持するため、エンジンが破棄されると登録も自動的に削除されます。
+_metadata_stores = weakref.WeakKeyDictionary()
+# データベースのキー (_metadata_store_key) -> _ListingCache (同じデータベースのストアで共有する一覧のキャッシュ)
+_listing_caches = {}
+_metadata_stores_lock = threading.Lock()
+
+
+def _metadata_store_key(engine):
+    """一覧のキャッシュを共有する単位 (データベース) のキーを返します。
+    SQLite のファイルは絶対パス、それ以外はパスワードを伏せた接続URLで、同じデータベースの別のエンジン
+    (接続プールの設定が異なるものなど) が同じキャッシュを共有するようにします。
+    インメモリの SQLite はエンジンごとに別のデータベースのため None を返します (キャッシュを共有しません)。
+    """
+    url = engine.url
+    if url.get_backend_name() == "sqlite":
+        if not url.database or url.database == ":memory:":
+            return None
+        return ("sqlite", os.path.normcase(os.path.realpath(url.database)))
+    return (url.get_backend_name(), url.render_as_string(hide_password=True))
+
+
+def remove_metadata_store(engine):
+    """エンジンの MetadataStore と、そのデータベースの一覧のキャッシュを登録から削除します。
+
+    Args:
+        engine (sqlalchemy.engine.Engine): メタデータDBのエンジン。
+    """
+    with _metadata_stores_lock:
+        _metadata_stores.pop(engine, None)
+        key = _metadata_store_key(engine)
+        if key is not None:
+            _listing_caches.pop(key, None)
+
+
+def get_metadata_store(engine):
+    """エンジンに対応する MetadataStore を取得します。初回はスキーママイグレーションを適用してから返します。
+    ストアはエンジンごとに作成し、一覧のキャッシュは同じデータベースのストアで共有します。
+
+    Args:
+        engine (sqlalchemy.engine.Engine): メタデータDB (SQLite) のエンジン。
+
+    Returns:
+        MetadataStore: メタデータストア。
+
+    Raises:
+        RuntimeError: スキーママイグレーションに失敗した場合。
+    """
+    with _metadata_stores_lock:
+        store = _metadata_stores.get(engine)
+        if store is None:
+            key = _metadata_store_key(engine)
+            listing_cache = _listing_caches.setdefault(key, _ListingCache()) if key is not None else None
+            store = MetadataStore(engine, listing_cache)
+            _metadata_stores[engine] = store
+        return store
@@ -0,0 +1,341 @@
+# 保存済みのカラムマッピングを使用して、Streamlit を介さずにデータ移行を実行するコマンドラインツール
+# cron などから実行し、結果 (スループットなど) を1行のJSONとして標準出力に出力します。
+#
+# 使用例:
+#   python migrate_cli.py 顧客情報マッピング --metadata-db metadata.db \
+#       --source-connection source_pg --target-connection target_pg \
+#       --chunksize 50000 --workers 4 --write-method copy
+#
+#   # 複数のマッピングを指定すると、ターゲットの外部キーの順序で最大 --max-concurrency テーブルずつ並行して移行します
+#   python migrate_cli.py 顧客 注文 注文明細 --max-concurrency 4
+#
+# 終了コード: 0 = 成功 / 1 = 移行に失敗 / 2 = 引数・設定の誤り
+import argparse
+import contextlib
+import datetime
+import json
+import sys
+from sqlalchemy.engine import make_url
+from db_utils import (
+    DATA_ENGINES,
+    LOAD_MODES,
+    WATERMARK_NULL_POLICIES,
+    WRITE_METHODS,
+    create_metadata_tables_if_not_exists,
+    dispose_all_engines,
+    get_connection_names,
+    get_db_engine,
+    get_postgres_connection_string,
+    load_column_mapping,
+    load_connection_info,
+    migrate_data,
+)
+from orchestrator import DEFAULT_MAX_CONCURRENCY, load_migration_tasks, run_migration_tasks
+
+
+class CliError(Exception):
+    """引数・設定の誤りなど、データ移行を開始できない場合のエラー。"""
+
+
+def _connection_url(connection_info):
+    """保存済み接続情報から、パスワードを伏せ字にした接続URLを生成します (マッピングに保存されたURLとの照合用)。"""
+    if connection_info.get("db_type") != "postgresql":
+        return None
+    return make_url(get_postgres_connection_string(**connection_info)).render_as_string(hide_password=True)
+
+
+def _find_connection_name(metadata_engine, db_url):
+    """マッピングに保存された接続URLと一致する保存済み接続の名前を探します。見つからない場合は None。"""
+    if not db_url:
+        return None
+    try:
+        masked_url = make_url(db_url).render_as_string(hide_password=True)
+    except Exception:
+        return None
+    for name in get_connection_names(metadata_engine):
+        connection_info = load_connection_info(metadata_engine, name)
+        if connection_info and _connection_url(connection_info) == masked_url:
+            return name
+    return None
+
+
+def _get_engine_for_connection(metadata_engine, connection_name, role):
+    """保存済み接続の名前からエンジンを取得します。
+
+    Raises:
+        CliError: 接続情報が見つからない、または未対応のデータベースタイプの場合。
+    """
+    connection_info = load_connection_info(metadata_engine, connection_name)
+    if not connection_info:
+        raise CliError(f"{role}の接続情報 '{connection_name}' がメタデータDBに見つかりません。")
+    db_type = connection_info.get("db_type")
+    if db_type != "postgresql":
+        raise CliError(f"{role}の接続情報 '{connection_name}' のデータベースタイプ '{db_type}' には対応していません。")
+    return get_db_engine(db_type, connection_info)
+
+
+def build_parser():
+    """コマンドライン引数のパーサーを作成します。"""
+    parser = argparse.ArgumentParser(
+        description="保存済みのカラムマッピングを使用してデータ移行を実行し、結果をJSONで出力します。",
+    )
+    parser.add_argument(
+        "mapping_names", nargs="+", metavar="mapping_name",
+        help="メタデータDBに保存されたマッピング設定の名前 (複数指定すると外部キーの順序で一括移行)",
+    )
+    parser.add_argument("--metadata-db", default="metadata.db", help="メタデータDB (SQLite) のファイルパス (デフォルト: metadata.db)")
+    parser.add_argument(
+        "--source-connection",
+        help="ソースDBの保存済み接続の名前 (省略時はマッピングに保存された接続URLと一致する保存済み接続を使用)",
+    )
+    parser.add_argument(
+        "--target-connection",
+        help="ターゲットDBの保存済み接続の名前 (省略時はマッピングに保存された接続URLと一致する保存済み接続を使用)",
+    )
+    parser.add_argument("--chunksize", type=int, default=1000, help="1回に読み書きする行数 (デフォルト: 1000)")
+    parser.add_argument("--write-method", choices=WRITE_METHODS, default="auto", help="書き込み方式 (デフォルト: auto)")
+    parser.add_argument("--conflict-columns", help="upsert の競合キー (カンマ区切り。省略時はターゲットの主キー・一意制約)")
+    parser.add_argument("--data-engine", choices=DATA_ENGINES, default="pandas", help="データエンジン (デフォルト: pandas)")
+    parser.add_argument(
+        "--type-conversion", action="store_true",
+        help="ソース・ターゲットのカラムの型から作成した型変換プランでチャンクを読み込む (NULLを含む整数を nullable 型で保持)",
+    )
+    parser.add_argument("--load-mode", choices=LOAD_MODES, default="append", help="ロードモード (デフォルト: append)")
+    parser.add_argument("--workers", type=int, default=1, help="並列ワーカー数 (デフォルト: 1)")
+    parser.add_argument(
+        "--max-concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY,
+        help=f"複数のマッピングを指定した場合に同時に移行するテーブル数 (デフォルト: {DEFAULT_MAX_CONCURRENCY})",
+    )
+    parser.add_argument("--key-column", help="範囲分割・チェックポイントに使用するソースのキーカラム (省略時は主キー)")
+    parser.add_argument("--pipeline-depth", type=int, default=0, help="読み込み・書き込みのパイプラインのキュー深さ (0 は無効)")
+    parser.add_argument(
+        "--spill-memory-budget-mb", type=float,
+        help="書き込み待ちのチャンクのメモリ予算 (MB)。超えた分は Parquet ファイルとしてディスクに退避する (省略時は退避しない)",
+    )
+    parser.add_argument("--spill-dir", help="チャンクを退避するステージングディレクトリの作成場所 (省略時はOSの一時ディレクトリ)")
+    parser.add_argument("--stream-results", action="store_true", help="サーバーサイドカーソルでストリーミング読み込みする")
+    parser.add_argument("--adaptive-chunksize", action="store_true", help="チャンクサイズを実測値から自動調整する")
+    parser.add_argument("--chunk-memory-budget-mb", type=float, default=256, help="自動調整時のメモリ予算 (MB、デフォルト: 256)")
+    parser.add_argument("--target-chunk-seconds", type=float, default=1.0, help="自動調整時の1チャンクの目標所要時間 (秒、デフォルト: 1.0)")
+    parser.add_argument(
+        "--target-rows-per-second", type=float,
+        help="自動調整時の目標スループット (行/秒)。達するまでチャンクサイズを大きくする (省略時はメモリ予算・目標所要時間の上限まで)",
+    )
+    parser.add_argument("--checkpoint", action="store_true", help="キー範囲ごとのチェックポイントをメタデータDBに記録する")
+    parser.add_argument("--resume", metavar="RUN_ID", help="指定した実行IDの中断された移行をチェックポイントから再開する")
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="マッピングに設定されたウォーターマークカラムで差分移行し、移行後に新しいウォーターマークを保存する",
+    )
+    parser.add_argument(
+        "--watermark-nulls", choices=WATERMARK_NULL_POLICIES, default="exclude",
+        help="差分移行でウォーターマークカラムが NULL の行の扱い (exclude: 移行しない / include: 毎回移行する。デフォルト: exclude)",
+    )
+    parser.add_argument(
+        "--no-history", action="store_true",
+        help="実行履歴 (移行全体とチャンクごとの所要時間) をメタデータDBに記録しない",
+    )
+    return parser
+
+
+def _resolve_engines(metadata_engine, args, config):
+    """マッピング設定のソース・ターゲットの保存済み接続の名前とエンジンを返します。
+
+    Returns:
+        tuple: (ソースの接続名, ターゲットの接続名, ソースのエンジン, ターゲットのエンジン)
+
+    Raises:
+        CliError: 保存済み接続が見つからない場合。
+    """
+    source_connection = args.source_connection or _find_connection_name(metadata_engine, config["source_db_url"])
+    target_connection = args.target_connection or _find_connection_name(metadata_engine, config["target_db_url"])
+    if not source_connection or not target_connection:
+        raise CliError(
+            "マッピングの接続URLと一致する保存済み接続が見つかりません。"
+            " --source-connection / --target-connection で保存済み接続の名前を指定してください。"
+        )
+    source_engine = _get_engine_for_connection(metadata_engine, source_connection, "ソース")
+    target_engine = _get_engine_for_connection(metadata_engine, target_connection, "ターゲット")
+    return source_connection, target_connection, source_engine, target_engine
+
+
+def _migration_options(args, metadata_engine):
+    """引数から migrate_data に渡す共通のオプションを作成します (単一・一括移行で共用)。"""
+    conflict_columns = None
+    if args.conflict_columns:
+        conflict_columns = [column.strip() for column in args.conflict_columns.split(",") if column.strip()]
+    return {
+        "chunksize": args.chunksize,
+        "write_method": args.write_method,
+        "stream_results": args.stream_results,
+        "workers": args.workers,
+        "pipeline_depth": args.pipeline_depth,
+        "spill_memory_budget_mb": args.spill_memory_budget_mb,
+        "spill_dir": args.spill_dir,
+        "metadata_engine": metadata_engine,
+        "checkpoint": args.checkpoint,
+        "conflict_columns": conflict_columns,
+        "data_engine": args.data_engine,
+        "type_conversion": args.type_conversion,
+        "adaptive_chunksize": args.adaptive_chunksize,
+        "chunk_memory_budget_mb": args.chunk_memory_budget_mb,
+        "target_chunk_seconds": args.target_chunk_seconds,
+        "target_rows_per_second": args.target_rows_per_second,
+        "load_mode": args.load_mode,
+        "watermark_nulls": args.watermark_nulls,
+        "record_history": not args.no_history,
+    }
+
+
+def run(args):
+    """引数に従ってデータ移行を実行し、結果の概要 (JSONに変換できる辞書) を返します。
+    複数のマッピングが指定された場合は run_batch で一括移行します。
+
+    Raises:
+        CliError: 引数・設定の誤りにより移行を開始できない場合。
+    """
+    metadata_engine = get_db_engine("sqlite", {"db_path": args.metadata_db})
+    create_metadata_tables_if_not_exists(metadata_engine)
+    if len(args.mapping_names) > 1:
+        return run_batch(args, metadata_engine)
+
+    mapping_name = args.mapping_names[0]
+    config, column_map = load_column_mapping(metadata_engine, mapping_name)
+    if not config:
+        raise CliError(f"マッピング '{mapping_name}' がメタデータDBに見つかりません。")
+    if not column_map:
+        raise CliError(f"マッピング '{mapping_name}' にカラムの対応が保存されていません。")
+    source_connection, target_connection, source_engine, target_engine = _resolve_engines(metadata_engine, args, config)
+
+    watermark_options = {}
+    if args.incremental:
+        if not config.get("watermark_column"):
+            raise CliError(f"マッピング '{mapping_name}' にウォーターマークカラムが設定されていません。")
+        watermark_options = {
+            "watermark_column": config["watermark_column"],
+            "watermark_value": config.get("watermark_value"),
+        }
+
+    started_at = datetime.datetime.now().astimezone()
+    stats = {}
+    success, message = migrate_data(
+        source_engine,
+        target_engine,
+        config["source_table"],
+        config["target_table"],
+        column_map,
+        key_column=args.key_column,
+        resume_run_id=args.resume,
+        mapping_name=mapping_name,
+        stats=stats,
+        **_migration_options(args, metadata_engine),
+        **watermark_options,
+    )
+    return {
+        "success": success,
+        "mapping": mapping_name,
+        "source_connection": source_connection,
+        "target_connection": target_connection,
+        "source_table": config["source_table"],
+        "target_table": config["target_table"],
+        "started_at": started_at.isoformat(),
+        "finished_at": datetime.datetime.now().astimezone().isoformat(),
+        "rows": stats.get("rows"),
+        "seconds": stats.get("seconds"),
+        "rows_per_sec": stats.get("rows_per_sec"),
+        "peak_rss_mb": stats.get("peak_rss_mb"),
+        "rss_increase_mb": stats.get("rss_increase_mb"),
+        "write_method": stats.get("write_method"),
+        "data_engine": stats.get("data_engine"),
+        "load_mode": stats.get("load_mode"),
+        "workers": stats.get("workers"),
+        "run_id": stats.get("run_id"),
+        "history_id": stats.get("history_id"),
+        "completed_ranges": len(stats.get("completed_ranges", [])),
+        "stages": stats.get("stages"),
+        "chunk_sizes": stats.get("chunk_sizes"),
+        "refresh": stats.get("refresh"),
+        "watermark_value": stats.get("watermark_value"),
+        "message": message,
+    }
+
+
+def run_batch(args, metadata_engine):
+    """複数のマッピングを、ターゲットの外部キーの順序で並行して移行し、結果の概要を返します。
+    --incremental の場合、ウォーターマークカラムが設定されていないマッピングは全件を移行します。
+
+    Raises:
+        CliError: 引数・設定の誤りにより移行を開始できない場合。
+    """
+    if args.resume:
+        raise CliError("--resume は複数のマッピングと併用できません。")
+    if args.key_column:
+        raise CliError("--key-column は複数のマッピングと併用できません (各テーブルの主キーを使用します)。")
+
+    connections = {}
+    def get_engines(mapping_name, config):
+        source_connection, target_connection, source_engine, target_engine = _resolve_engines(metadata_engine, args, config)
+        connections[mapping_name] = {"source_connection": source_connection, "target_connection": target_connection}
+        return source_engine, target_engine
+
+    try:
+        tasks = load_migration_tasks(metadata_engine, args.mapping_names, get_engines, incremental=args.incremental)
+    except ValueError as e:
+        raise CliError(str(e))
+
+    started_at = datetime.datetime.now().astimezone()
+    batch_stats = {}
+    success, message = run_migration_tasks(
+        tasks,
+        max_concurrency=args.max_concurrency,
+        stats=batch_stats,
+        **_migration_options(args, metadata_engine),
+    )
+    return {
+        "success": success,
+        "mappings": list(dict.fromkeys(args.mapping_names)),
+        "started_at": started_at.isoformat(),
+        "finished_at": datetime.datetime.now().astimezone().isoformat(),
+        "rows": batch_stats.get("rows"),
+        "seconds": batch_stats.get("seconds"),
+        "rows_per_sec": batch_stats.get("rows_per_sec"),
+        "table_seconds": batch_stats.get("table_seconds"),
+        "max_concurrency": batch_stats.get("max_concurrency"),
+        "succeeded": batch_stats.get("succeeded"),
+        "failed": batch_stats.get("failed"),
+        "skipped": batch_stats.get("skipped"),
+        "warnings": batch_stats.get("warnings"),
+        "tables": [
+            {**connections.get(result["name"], {}), **result}
+            for result in batch_stats.get("tables", [])
+        ],
+        "message": message,
+    }
+
+
+def main(argv=None):
+    """コマンドラインのエントリーポイント。終了コードを返します。"""
+    args = build_parser().parse_args(argv)
+    mapping_fields = (
+        {"mapping": args.mapping_names[0]} if len(args.mapping_names) == 1 else {"mappings": args.mapping_names}
+    )
+    try:
+        # db_utils のログ出力 (print) が結果のJSONに混ざらないよう、実行中の標準出力は標準エラー出力に回す
+        with contextlib.redirect_stdout(sys.stderr):
+            summary = run(args)
+        exit_code = 0 if summary["success"] else 1
+    except CliError as e:
+        summary = {"success": False, **mapping_fields, "message": str(e)}
+        exit_code = 2
+    except Exception as e: # 接続エラーなど
+        summary = {"success": False, **mapping_fields, "message": f"データ移行を開始できませんでした: {e}"}
+        exit_code = 1
+    finally:
+        dispose_all_engines() # プールに残っている接続を閉じる
+    # cron のログや監視ツールで扱いやすいよう、結果は1行のJSONとして出力する
+    print(json.dumps(summary, ensure_ascii=False, default=str))
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
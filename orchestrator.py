@@ -0,0 +1,260 @@
+# 複数の保存済みマッピングをまとめて移行するオーケストレーター
+# ターゲットの外部キーから依存関係グラフを作成し、親テーブルを子テーブルより先に移行しながら、
+# 依存関係のないテーブル同士は同時実行数の上限まで並行して移行します。
+import concurrent.futures
+import time
+from db_utils import (
+    get_foreign_key_dependencies,
+    load_column_mapping,
+    migrate_data,
+)
+
+# 同時に移行するテーブル数のデフォルト
+# (テーブルごとに workers > 1 を指定した場合、同時に使用する接続数は最大で 同時実行数 × workers になります)
+DEFAULT_MAX_CONCURRENCY = 4
+
+
+def load_migration_tasks(metadata_engine, mapping_names, get_engines, incremental=False):
+    """保存済みのマッピング設定から、移行タスクのリストを作成します。
+
+    Args:
+        metadata_engine (sqlalchemy.engine.Engine): メタデータDBのエンジン。
+        mapping_names (list): 移行するマッピング設定の名前のリスト。
+        get_engines (callable): get_engines(マッピング名, マッピング設定) で (ソースのエンジン, ターゲットのエンジン) を返す関数。
+        incremental (bool, optional): True の場合、ウォーターマークカラムが設定されたマッピングは差分移行し、
+            移行後に新しいウォーターマークを保存します。デフォルトは False。
+
+    Returns:
+        list: 移行タスクの辞書のリスト
+            (例: [{"name": "顧客", "source_engine": ..., "target_engine": ..., "source_table": "customers",
+                   "target_table": "customers", "column_map": {...}, "options": {...}}, ...])。
+
+    Raises:
+        ValueError: マッピング設定が見つからない、またはカラムの対応が保存されていない場合。
+    """
+    tasks = []
+    for mapping_name in dict.fromkeys(mapping_names): # 重複を除外 (指定順は維持)
+        config, column_map = load_column_mapping(metadata_engine, mapping_name)
+        if not config:
+            raise ValueError(f"マッピング '{mapping_name}' がメタデータDBに見つかりません。")
+        if not column_map:
+            raise ValueError(f"マッピング '{mapping_name}' にカラムの対応が保存されていません。")
+        source_engine, target_engine = get_engines(mapping_name, config)
+        options = {"mapping_name": mapping_name} # 実行履歴・ウォーターマークの保存先
+        if incremental and config.get("watermark_column"):
+            options.update({
+                "watermark_column": config["watermark_column"],
+                "watermark_value": config.get("watermark_value"),
+            })
+        tasks.append({
+            "name": mapping_name,
+            "source_engine": source_engine,
+            "target_engine": target_engine,
+            "source_table": config["source_table"],
+            "target_table": config["target_table"],
+            "column_map": column_map,
+            "options": options,
+        })
+    return tasks
+
+
+def build_dependency_graph(tasks):
+    """ターゲットの外部キーから、移行タスク間の依存関係を作成します。
+    子テーブルへ書き込むタスクは、参照先の親テーブルへ書き込むすべてのタスクに依存します
+    (同じターゲットのエンジンへ書き込むタスク同士のみを対象とし、自己参照は除外します)。
+
+    Args:
+        tasks (list): load_migration_tasks が返す移行タスクのリスト。
+
+    Returns:
+        dict: {タスク名: 先に完了している必要があるタスク名の集合, ...} の形式の辞書。
+
+    Raises:
+        RuntimeError: 外部キー情報の取得に失敗した場合。
+    """
+    dependencies = {task["name"]: set() for task in tasks}
+    tasks_by_engine = {}
+    for task in tasks:
+        tasks_by_engine.setdefault(task["target_engine"], []).append(task)
+
+    for target_engine, engine_tasks in tasks_by_engine.items():
+        target_tables = list(dict.fromkeys(task["target_table"] for task in engine_tasks))
+        table_dependencies = get_foreign_key_dependencies(target_engine, target_tables)
+        writers_by_table = {}
+        for task in engine_tasks:
+            writers_by_table.setdefault(task["target_table"], []).append(task["name"])
+        for task in engine_tasks:
+            for parent_table in table_dependencies.get(task["target_table"], ()):
+                dependencies[task["name"]].update(writers_by_table.get(parent_table, []))
+            dependencies[task["name"]].discard(task["name"])
+    return dependencies
+
+
+def _count_descendants(dependencies):
+    """各タスクに (推移的に) 依存しているタスクの数を数えます。依存されているタスクを優先して開始するために使用します。"""
+    dependents = {name: set() for name in dependencies}
+    for name, parents in dependencies.items():
+        for parent in parents:
+            dependents[parent].add(name)
+    counts = {}
+    for name in dependencies:
+        visited = set()
+        stack = list(dependents[name])
+        while stack:
+            dependent = stack.pop()
+            if dependent not in visited:
+                visited.add(dependent)
+                stack.extend(dependents[dependent])
+        visited.discard(name) # 循環参照の場合は自分自身を数えない
+        counts[name] = len(visited)
+    return dependents, counts
+
+
+def _run_task(task, migration_options, dependencies, orchestration_started_at):
+    """1つの移行タスクを実行し、結果の辞書を返します (ワーカースレッドで実行)。"""
+    started_at = time.perf_counter()
+    task_stats = {}
+    try:
+        success, message = migrate_data(
+            task["source_engine"],
+            task["target_engine"],
+            task["source_table"],
+            task["target_table"],
+            task["column_map"],
+            stats=task_stats,
+            **{**migration_options, **task["options"]},
+        )
+    except Exception as e: # migrate_data は通常 (False, メッセージ) を返すが、念のため他のタスクを止めない
+        success, message = False, f"データ移行中にエラーが発生しました: {e}"
+    finished_at = time.perf_counter()
+    seconds = task_stats.get("seconds", finished_at - started_at)
+    rows = task_stats.get("rows", 0)
+    return {
+        "name": task["name"],
+        "source_table": task["source_table"],
+        "target_table": task["target_table"],
+        "status": "success" if success else "failed",
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_sec": task_stats.get("rows_per_sec", rows / seconds if seconds > 0 else 0.0),
+        "started_offset_seconds": started_at - orchestration_started_at,
+        "finished_offset_seconds": finished_at - orchestration_started_at,
+        "depends_on": sorted(dependencies[task["name"]]),
+        "history_id": task_stats.get("history_id"),
+        "message": message,
+    }
+
+
+def run_migration_tasks(tasks, max_concurrency=DEFAULT_MAX_CONCURRENCY, dependencies=None, stats=None, **migration_options):
+    """依存関係の順序を守りながら、複数の移行タスクを並行して実行します。
+
+    依存しているタスクがすべて成功したタスクから順に、同時実行数の上限まで並行して開始します
+    (開始可能なタスクが複数ある場合は、より多くのタスクから依存されているものを優先します)。
+    失敗したタスクに (推移的に) 依存しているタスクはスキップし、それ以外のタスクの移行は続行します。
+    外部キーが循環している場合は、未完了の依存が最も少ないタスクから開始して循環を解消します。
+
+    Args:
+        tasks (list): load_migration_tasks が返す移行タスクのリスト。
+        max_concurrency (int, optional): 同時に移行するテーブル数の上限。デフォルトは DEFAULT_MAX_CONCURRENCY。
+        dependencies (dict, optional): build_dependency_graph が返す依存関係。省略時はターゲットの外部キーから作成します。
+        stats (dict, optional): 指定した場合、移行結果の詳細 (テーブルごとの結果、合計行数、全体の所要時間・スループット、
+            成功・失敗・スキップの件数、警告) が格納されます。
+        **migration_options: 各タスクの migrate_data に渡すオプション (chunksize, write_method, workers など)。
+
+    Returns:
+        tuple: (bool, str) すべてのタスクが成功したかどうかとメッセージ。
+    """
+    stats = stats if stats is not None else {}
+    stats.update({"tables": [], "warnings": [], "max_concurrency": max_concurrency})
+    if not tasks:
+        return False, "移行するマッピングが選択されていません。"
+    task_names = [task["name"] for task in tasks]
+    if len(set(task_names)) != len(task_names):
+        return False, "同じ名前の移行タスクが含まれています。"
+    max_concurrency = max(1, int(max_concurrency))
+
+    try:
+        dependencies = dependencies if dependencies is not None else build_dependency_graph(tasks)
+    except Exception as e:
+        return False, f"移行順序の決定に失敗しました: {e}"
+    dependencies = {name: set(dependencies.get(name, ())) & set(task_names) for name in task_names}
+    dependents, descendant_counts = _count_descendants(dependencies)
+
+    pending = {task["name"]: task for task in tasks}
+    unfinished_dependencies = {name: set(parents) for name, parents in dependencies.items()}
+    results = stats["tables"]
+    orchestration_started_at = time.perf_counter()
+
+    def skip_dependents(failed_name):
+        """失敗したタスクに依存している未開始のタスクをスキップします。"""
+        stack = list(dependents[failed_name])
+        while stack:
+            name = stack.pop()
+            if name not in pending:
+                continue
+            task = pending.pop(name)
+            results.append({
+                "name": name,
+                "source_table": task["source_table"],
+                "target_table": task["target_table"],
+                "status": "skipped",
+                "rows": 0,
+                "seconds": 0.0,
+                "rows_per_sec": 0.0,
+                "started_offset_seconds": None,
+                "finished_offset_seconds": None,
+                "depends_on": sorted(dependencies[name]),
+                "history_id": None,
+                "message": f"依存するマッピング '{failed_name}' の移行に失敗したため、スキップしました。",
+            })
+            stack.extend(dependents[name])
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="migration_orchestrator") as executor:
+        running = {}
+        while pending or running:
+            ready = sorted(
+                (name for name in pending if not unfinished_dependencies[name]),
+                key=lambda name: (-descendant_counts[name], name),
+            )
+            if not ready and not running:
+                # 外部キーの循環: 未完了の依存が最も少ないタスクから開始する (親の行がまだ無い場合、外部キー制約で失敗する可能性がある)
+                name = min(pending, key=lambda name: (len(unfinished_dependencies[name]), name))
+                stats["warnings"].append(
+                    f"外部キーが循環しているため、マッピング '{name}' を依存先"
+                    f" ({', '.join(sorted(unfinished_dependencies[name]))}) の完了前に移行します。"
+                )
+                ready = [name]
+            for name in ready[:max_concurrency - len(running)]:
+                future = executor.submit(_run_task, pending.pop(name), migration_options, dependencies, orchestration_started_at)
+                running[future] = name
+
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                result = future.result()
+                results.append(result)
+                if result["status"] == "success":
+                    for dependent in dependents[name]:
+                        unfinished_dependencies[dependent].discard(name)
+                else:
+                    skip_dependents(name)
+
+    elapsed = time.perf_counter() - orchestration_started_at
+    total_rows = sum(result["rows"] for result in results)
+    counts = {status: sum(1 for result in results if result["status"] == status) for status in ("success", "failed", "skipped")}
+    stats.update({
+        "rows": total_rows,
+        "seconds": elapsed,
+        "rows_per_sec": total_rows / elapsed if elapsed > 0 else 0.0,
+        # 各テーブルの所要時間の合計 / 全体の所要時間 (並行実行による短縮の目安)
+        "table_seconds": sum(result["seconds"] for result in results),
+        "succeeded": counts["success"],
+        "failed": counts["failed"],
+        "skipped": counts["skipped"],
+    })
+    summary_text = (
+        f"{len(tasks)}テーブル中 {counts['success']}テーブルの移行が完了しました"
+        f" (失敗: {counts['failed']}, スキップ: {counts['skipped']}, 合計 {total_rows}行,"
+        f" {elapsed:.1f}秒, {stats['rows_per_sec']:,.0f}行/秒, 同時実行数: {max_concurrency})"
+    )
+    return counts["success"] == len(tasks), summary_text
@@ -1,4 +1,5 @@
 import streamlit as st
+from db_utils import DEFAULT_POOL_OPTIONS # 接続プールの既定の設定
 
 def initialize_session_state():
     """
@@ -36,6 +37,8 @@ def initialize_session_state():
         st.session_state.target_engine = None
     if "metadata_engine" not in st.session_state: # メタデータDB用エンジン
         st.session_state.metadata_engine = None
+    if "pool_options" not in st.session_state: # エンジン (接続プール) の設定。エンジン自体は db_utils のレジストリで全セッション共有
+        st.session_state.pool_options = dict(DEFAULT_POOL_OPTIONS)
 
     # 各接続フォーム固有のPostgreSQL接続パラメータ
     # これらは上記の postgres_conn_params テンプレートを基に、個別のデフォルト値を持つ
@@ -69,6 +72,8 @@ def initialize_session_state():
         st.session_state.column_map = {}
     if "saved_mappings" not in st.session_state: # 保存済みのマッピング設定名リスト (メタデータDBから読み込む)
         st.session_state.saved_mappings = []
+    if "current_watermark_column" not in st.session_state: # 差分移行に使用するウォーターマークカラム (空文字は未設定)
+        st.session_state.current_watermark_column = ""
 
     # --- 注意事項 (開発者向けコメント) ---
     # 以下のコメントは、この初期化関数と各UIモジュール間の連携に関する補足です。
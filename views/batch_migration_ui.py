@@ -0,0 +1,161 @@
+import streamlit as st
+import pandas as pd
+from db_utils import (
+    WRITE_METHODS,             # データ移行の書き込み方式一覧
+    DATA_ENGINES,              # データ移行のデータエンジン一覧
+    get_mapping_config_names,  # 保存済みのマッピング設定名を取得
+)
+from orchestrator import (
+    DEFAULT_MAX_CONCURRENCY,   # 同時に移行するテーブル数のデフォルト
+    load_migration_tasks,      # 保存済みマッピングから移行タスクを作成
+    build_dependency_graph,    # ターゲットの外部キーから移行順序を決定
+    run_migration_tasks,       # 依存関係の順序を守りながら並行して移行
+)
+
+_RESULT_COLUMN_LABELS = {
+    "name": "マッピング", "source_table": "ソーステーブル", "target_table": "ターゲットテーブル",
+    "status": "結果", "rows": "行数", "seconds": "所要時間 (秒)", "rows_per_sec": "行/秒",
+    "started_offset_seconds": "開始 (秒)", "finished_offset_seconds": "終了 (秒)",
+    "depends_on": "依存先", "history_id": "履歴ID", "message": "メッセージ",
+}
+_STATUS_LABELS = {"success": "成功", "failed": "失敗", "skipped": "スキップ"}
+
+
+def render_batch_migration_ui():
+    """
+    複数の保存済みマッピングをまとめて移行するためのUIコンポーネントを描画します。
+    ターゲットの外部キーから移行順序を決定し、依存関係のないテーブルは同時実行数の上限まで並行して移行します。
+    ソース・ターゲットには「接続1」「接続2」で接続中のデータベースを使用します。
+    """
+    st.header("一括データ移行") # セクションヘッダー
+
+    # --- 前提条件のチェック ---
+    if not st.session_state.get("metadata_engine"):
+        st.warning("一括データ移行を行うには、まずサイドバーからメタデータDBに接続してください。")
+        return
+    if not st.session_state.get("source_engine") or not st.session_state.get("target_engine"):
+        st.warning("一括データ移行を行うには、「接続1 (ソースDB)」と「接続2 (ターゲットDB)」に接続してください。")
+        return
+
+    metadata_engine = st.session_state.metadata_engine
+    mapping_names = get_mapping_config_names(metadata_engine)
+    if not mapping_names:
+        st.info("保存済みのマッピング設定がありません。「カラムマッピング設定」でマッピングを保存してください。")
+        return
+
+    selected_mappings = st.multiselect(
+        "移行するマッピング",
+        options=mapping_names,
+        key="batch_migration_ui_mappings", # ユニークキー
+        help="選択したマッピングのテーブルを、ターゲットの外部キーに従って親テーブルから順に移行します。"
+             "ソース・ターゲットには現在接続中の「接続1」「接続2」を使用します。"
+    )
+
+    # 同時実行数とテーブルごとの移行設定
+    concurrency_col, chunk_col, workers_col = st.columns(3)
+    with concurrency_col:
+        max_concurrency = st.number_input(
+            "同時に移行するテーブル数",
+            min_value=1, max_value=32, value=DEFAULT_MAX_CONCURRENCY, step=1,
+            key="batch_migration_ui_max_concurrency", # ユニークキー
+            help="依存関係のないテーブル同士を並行して移行する際の上限です。"
+        )
+    with chunk_col:
+        chunk_size = st.number_input(
+            "一度に処理する行数 (チャンクサイズ)",
+            min_value=100, max_value=10000, value=1000, step=100,
+            key="batch_migration_ui_chunk_size", # ユニークキー
+        )
+    with workers_col:
+        workers = st.number_input(
+            "テーブルごとの並列ワーカー数",
+            min_value=1, max_value=16, value=1, step=1,
+            key="batch_migration_ui_workers", # ユニークキー
+            help="2以上を指定すると、各テーブルを主キーの値域で分割して並列に移行します。"
+                 "同時に使用する接続数は最大で「同時に移行するテーブル数 × 並列ワーカー数」になります。"
+        )
+    method_col, engine_col = st.columns(2)
+    with method_col:
+        write_method = st.selectbox(
+            "書き込み方式",
+            options=list(WRITE_METHODS),
+            key="batch_migration_ui_write_method", # ユニークキー
+        )
+    with engine_col:
+        data_engine = st.selectbox(
+            "データエンジン",
+            options=list(DATA_ENGINES),
+            key="batch_migration_ui_data_engine", # ユニークキー
+        )
+    incremental = st.checkbox(
+        "ウォーターマークが設定されたマッピングは差分移行する",
+        value=False,
+        key="batch_migration_ui_incremental", # ユニークキー
+    )
+    record_history = st.checkbox(
+        "実行履歴を記録する",
+        value=True,
+        key="batch_migration_ui_record_history", # ユニークキー
+        help="テーブルごとの移行結果とチャンクごとの所要時間をメタデータDBに記録します。「データ移行」の「実行履歴」で確認できます。"
+    )
+
+    def get_engines(mapping_name, config):
+        return st.session_state.source_engine, st.session_state.target_engine
+
+    plan_col, execute_col = st.columns(2)
+    with plan_col:
+        show_plan = st.button("移行順序を確認", disabled=not selected_mappings, key="batch_migration_ui_plan_button")
+    with execute_col:
+        execute = st.button(
+            "一括データ移行実行", disabled=not selected_mappings, type="primary", key="batch_migration_ui_execute_button"
+        )
+
+    if show_plan or execute:
+        try:
+            tasks = load_migration_tasks(metadata_engine, selected_mappings, get_engines, incremental=incremental)
+            dependencies = build_dependency_graph(tasks)
+        except Exception as e:
+            st.error(f"移行順序の決定に失敗しました: {e}")
+            return
+
+    if show_plan:
+        st.write("外部キーによる依存関係 (依存先のマッピングが成功した後に移行されます):")
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    "マッピング": task["name"],
+                    "ターゲットテーブル": task["target_table"],
+                    "依存先": ", ".join(sorted(dependencies[task["name"]])),
+                }
+                for task in tasks
+            ]),
+            use_container_width=True,
+        )
+
+    if execute:
+        batch_stats = {}
+        with st.spinner(f"{len(tasks)}テーブルを移行中..."):
+            success, message = run_migration_tasks(
+                tasks,
+                max_concurrency=max_concurrency,
+                dependencies=dependencies,
+                stats=batch_stats,
+                chunksize=chunk_size,
+                write_method=write_method,
+                data_engine=data_engine,
+                workers=workers,
+                metadata_engine=metadata_engine,
+                record_history=record_history,
+            )
+        if success:
+            st.success(message)
+        else:
+            st.error(message)
+        for warning in batch_stats.get("warnings", []):
+            st.warning(warning)
+        if batch_stats.get("tables"):
+            results_df = pd.DataFrame(batch_stats["tables"])
+            results_df["status"] = results_df["status"].map(lambda s: _STATUS_LABELS.get(s, s))
+            results_df["depends_on"] = results_df["depends_on"].map(", ".join)
+            st.write("テーブルごとの結果 (完了順):")
+            st.dataframe(results_df.rename(columns=_RESULT_COLUMN_LABELS), use_container_width=True)
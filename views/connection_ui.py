@@ -2,7 +2,7 @@ import streamlit as st
 from db_utils import (
     test_postgres_connection,  # PostgreSQL接続テストに使用
     get_db_engine,             # DBエンジン取得に使用
-    get_table_names,           # 接続成功時にテーブル名一覧を取得するために使用
+    load_table_names_in_background, # 接続成功時にテーブル名一覧をバックグラウンドで取得するために使用
     save_connection_info,      # 接続情報の保存
     get_connection_names,      # 保存された接続名一覧の取得
     load_connection_info,      # 保存された接続情報の読み込み
@@ -16,7 +16,7 @@ def render_db_connection_form(conn_key_prefix: str):
     データベース接続用のフォームUIコンポーネントを描画します。
     ユーザーが入力した接続情報は st.session_state に保存されます。
     接続テストボタンが押されると、実際にDBへの接続を試み、結果を表示します。
-    接続に成功した場合、テーブル情報も取得してセッション状態を更新します。
+    接続に成功した場合、テーブル情報の取得をバックグラウンドで開始します。
 
     Args:
         conn_key_prefix (str): "source" または "target"。セッション状態のキープレフィックスとして使用。
@@ -79,45 +79,40 @@ def render_db_connection_form(conn_key_prefix: str):
         ):
             try:
                 # db_utilsのget_db_engineを使用してエンジンを取得 (内部で接続テストも実行)
-                engine = get_db_engine("postgresql", pg_params)
+                # 同じ接続先のエンジンは全セッションで共有され、接続プールが再利用される
+                engine = get_db_engine("postgresql", pg_params, pool_options=st.session_state.get("pool_options"))
                 if engine:
                     st.session_state[db_engine_key] = engine # 成功したらエンジンをセッション状態に保存
                     st.success(f"PostgreSQL ({conn_key_prefix.capitalize()}) への接続に成功しました。")
 
-                    # 接続成功後、テーブル名一覧を取得してセッション状態を更新
-                    try:
-                        # フォームからスキーマ名を取得 (state.pyのデフォルト値も考慮)
-                        current_schema_name = pg_params.get("schema_name", "public")
-                        if not current_schema_name: # 空文字列が入力された場合は 'public' を使用
-                            current_schema_name = "public"
+                    # 接続成功後、テーブル名一覧の取得をバックグラウンドで開始する
+                    # (カタログの取得が遅い接続先でも画面を止めないよう、結果はデータベース情報の表示側で反映する)
+                    # フォームからスキーマ名を取得 (state.pyのデフォルト値も考慮)
+                    current_schema_name = pg_params.get("schema_name", "public")
+                    if not current_schema_name: # 空文字列が入力された場合は 'public' を使用
+                        current_schema_name = "public"
 
-                        table_names = get_table_names(engine, schema_name=current_schema_name)
-                        if conn_key_prefix == "source":
-                            st.session_state.source_tables = table_names
-                            st.session_state.source_selected_table = None # テーブル選択をリセット
-                            st.session_state.source_columns = []         # カラム情報もリセット
-                        elif conn_key_prefix == "target":
-                            st.session_state.target_tables = table_names
-                            st.session_state.target_selected_table = None # テーブル選択をリセット
-                            st.session_state.target_columns = []         # カラム情報もリセット
+                    st.session_state[f"{conn_key_prefix}_tables_future"] = load_table_names_in_background(
+                        engine, schema_name=current_schema_name
+                    )
+                    if conn_key_prefix == "source":
+                        st.session_state.source_tables = []          # 読み込み完了まで空にする
+                        st.session_state.source_selected_table = None # テーブル選択をリセット
+                        st.session_state.source_columns = []         # カラム情報もリセット
+                    elif conn_key_prefix == "target":
+                        st.session_state.target_tables = []          # 読み込み完了まで空にする
+                        st.session_state.target_selected_table = None # テーブル選択をリセット
+                        st.session_state.target_columns = []         # カラム情報もリセット
 
-                        # 接続パラメータ（スキーマ名含む）をセッション状態に保存
-                        # これはst.text_inputのon_changeやコールバックがなくても、
-                        # pg_paramsがst.session_state[db_params_key]を参照していれば自動的に更新されるはずだが、
-                        # 明示的に代入しておくことで確実性を高める。
-                        # ただし、pg_paramsがst.session_state.get()のデフォルト辞書から来ている場合、
-                        # この代入は必須。
-                        st.session_state[db_params_key] = pg_params
+                    # 接続パラメータ（スキーマ名含む）をセッション状態に保存
+                    # これはst.text_inputのon_changeやコールバックがなくても、
+                    # pg_paramsがst.session_state[db_params_key]を参照していれば自動的に更新されるはずだが、
+                    # 明示的に代入しておくことで確実性を高める。
+                    # ただし、pg_paramsがst.session_state.get()のデフォルト辞書から来ている場合、
+                    # この代入は必須。
+                    st.session_state[db_params_key] = pg_params
 
-                        # この下に st.rerun() を追加
-                        st.rerun() # ★ 追記
-                    except RuntimeError as e_tables: # get_table_namesでエラーが発生した場合
-                        st.error(f"テーブル一覧の取得に失敗しました: {e_tables}")
-                        # テーブルリストを空にする
-                        if conn_key_prefix == "source": st.session_state.source_tables = []
-                        elif conn_key_prefix == "target": st.session_state.target_tables = []
-                        # エラー発生時も再描画するならここにも st.rerun() を追加検討
-                        st.rerun() # ★ 追記 (エラー時も状態をUIに反映するため)
+                    st.rerun() # 接続済みの状態を即座に表示 (テーブル一覧は読み込み完了後に表示される)
                 else:
                     # get_db_engine が None を返した場合 (通常は例外が発生するが念のため)
                     st.session_state[db_engine_key] = None
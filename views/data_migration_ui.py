@@ -2,9 +2,165 @@ import streamlit as st
 import pandas as pd # st.json やデータ操作のUIで間接的に使用される可能性を考慮
 from db_utils import (
     migrate_data,              # データ移行処理
+    WRITE_METHODS,             # データ移行の書き込み方式一覧
+    DATA_ENGINES,              # データ移行のデータエンジン一覧
+    LOAD_MODES,                # データ移行のロードモード一覧
+    WATERMARK_NULL_POLICIES,   # 差分移行でのウォーターマークが NULL の行の扱い
+    get_resumable_migration_runs, # 再開可能なデータ移行の一覧
+    get_migration_runs,        # データ移行の実行履歴
+    load_migration_chunks,     # 実行履歴のチャンクごとの計測値
+    load_column_mapping,       # 差分移行用のウォーターマークの読み込み
     generate_insert_statement, # INSERT文生成処理
     insert_record              # 単一レコード挿入処理
 )
+from jobs import get_job_manager # バックグラウンドジョブとしてのデータ移行
+
+def _format_duration(seconds):
+    """秒数を「1時間2分3秒」の形式の文字列に変換します。"""
+    seconds = int(round(seconds))
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    if hours:
+        return f"{hours}時間{minutes}分{seconds}秒"
+    if minutes:
+        return f"{minutes}分{seconds}秒"
+    return f"{seconds}秒"
+
+
+def _make_progress_callback():
+    """データ移行の進捗を、プログレスバーとスループットの推移のグラフとして表示するコールバックを作成します。"""
+    progress_bar = st.progress(0.0, text="データ移行を開始しています...")
+    throughput_chart = st.empty()
+    throughput_samples = [] # (経過時間, 行/秒) の推移
+
+    def on_progress(progress):
+        if progress["total_rows"] is not None:
+            rows_text = f"{progress['rows']:,} / 約{progress['total_rows']:,}行 ({progress['fraction']:.0%})"
+        else:
+            rows_text = f"{progress['rows']:,}行"
+        eta_text = f" - 残り約{_format_duration(progress['eta_seconds'])}" if progress["eta_seconds"] is not None else ""
+        if progress["done"]:
+            eta_text = f" - 完了 ({_format_duration(progress['elapsed_seconds'])})"
+        progress_bar.progress(
+            min(progress["fraction"] or 0.0, 1.0),
+            text=f"{rows_text} - {progress['rows_per_sec']:,.0f}行/秒{eta_text}",
+        )
+        if not progress["done"]:
+            throughput_samples.append({"経過時間 (秒)": round(progress["elapsed_seconds"], 1), "行/秒": progress["rows_per_sec"]})
+            throughput_chart.line_chart(pd.DataFrame(throughput_samples).set_index("経過時間 (秒)"))
+
+    return on_progress
+
+
+_STAGE_CHART_LABELS = {"read_seconds": "読み込み", "transform_seconds": "変換", "write_seconds": "書き込み"}
+
+
+def _render_chunk_breakdown(chunks):
+    """チャンクごとの読み込み・変換・書き込みの所要時間とスループットを表示します。"""
+    chunks_df = pd.DataFrame(chunks).set_index("chunk_index")
+    st.write("チャンクごとの所要時間 (秒):")
+    st.bar_chart(chunks_df[list(_STAGE_CHART_LABELS)].rename(columns=_STAGE_CHART_LABELS))
+    st.write("チャンクごとのスループット (行/秒):")
+    st.line_chart(chunks_df[["rows_per_sec"]].rename(columns={"rows_per_sec": "行/秒"}))
+    with st.expander(f"チャンクごとの計測値 ({len(chunks_df)}チャンク)"):
+        if "bytes" in chunks_df:
+            chunks_df["bytes"] = chunks_df["bytes"] / (1024 * 1024)
+        st.dataframe(
+            chunks_df.rename(columns={
+                "range_index": "範囲No.", "rows": "行数", "bytes": "サイズ (MB)", **_STAGE_CHART_LABELS,
+                "rows_per_sec": "行/秒", "peak_rss_mb": "RSS (MB)", "finished_offset_seconds": "完了 (開始からの秒)",
+            }),
+            use_container_width=True,
+        )
+
+
+def _render_migration_history(metadata_engine, source_table, target_table):
+    """選択中のソース・ターゲットテーブルのデータ移行の実行履歴と、選択した実行のチャンクごとの内訳を表示します。"""
+    runs = get_migration_runs(metadata_engine, source_table=source_table, target_table=target_table)
+    if not runs:
+        return
+    st.markdown("##### 実行履歴")
+    runs_df = pd.DataFrame(runs)
+    st.dataframe(
+        runs_df[[
+            "id", "started_at", "mapping_name", "status", "rows", "seconds", "rows_per_sec",
+            "read_seconds", "transform_seconds", "write_seconds", "chunk_count", "chunksize",
+            "write_method", "data_engine", "workers", "pipeline_depth", "peak_rss_mb",
+        ]].rename(columns={
+            "id": "履歴ID", "started_at": "開始日時", "mapping_name": "マッピング", "status": "結果", "rows": "行数",
+            "seconds": "所要時間 (秒)", "rows_per_sec": "行/秒", "read_seconds": "読み込み (秒)",
+            "transform_seconds": "変換 (秒)", "write_seconds": "書き込み (秒)", "chunk_count": "チャンク数",
+            "chunksize": "チャンクサイズ", "write_method": "書き込み方式", "data_engine": "データエンジン",
+            "workers": "並列数", "pipeline_depth": "キュー深さ", "peak_rss_mb": "ピークRSS (MB)",
+        }),
+        use_container_width=True,
+        hide_index=True,
+    )
+    # 成功した実行のスループットの推移 (同じテーブルの実行同士の比較用)
+    successful_runs_df = runs_df[runs_df["status"] == "success"]
+    if len(successful_runs_df) > 1:
+        st.write("スループットの推移 (行/秒):")
+        st.line_chart(successful_runs_df.set_index("started_at").sort_index()[["rows_per_sec"]].rename(columns={"rows_per_sec": "行/秒"}))
+
+    runs_by_id = {run["id"]: run for run in runs}
+    selected_history_id = st.selectbox(
+        "内訳を表示する実行",
+        options=list(runs_by_id),
+        format_func=lambda history_id: (
+            f"{runs_by_id[history_id]['started_at']} - {runs_by_id[history_id]['rows']}行"
+            f" ({runs_by_id[history_id]['status']}, 履歴ID: {history_id})"
+        ),
+        key="data_migration_ui_history_run_select", # ユニークキー
+    )
+    chunks = load_migration_chunks(metadata_engine, selected_history_id)
+    if chunks:
+        _render_chunk_breakdown(chunks)
+    else:
+        st.info("この実行にはチャンクごとの計測値が記録されていません。")
+
+
+def _render_migration_result(success, message, migration_stats):
+    """データ移行の結果メッセージと詳細 (ステージ別の所要時間、完了したキー範囲) を表示します。"""
+    if success:
+        st.success(message)
+    else:
+        st.error(message)
+
+    # ステージごとの所要時間・待機時間を表示 (どちら側がボトルネックかの確認用)
+    if success and migration_stats.get("stages"):
+        stage_labels = {
+            "read_seconds": "読み込み", "transform_seconds": "変換", "write_seconds": "書き込み",
+            "reader_stall_seconds": "読み込み側の待機 (キュー満杯)", "writer_stall_seconds": "書き込み側の待機 (キュー空)",
+        }
+        st.write("ステージ別の所要時間 (秒):")
+        st.dataframe(
+            pd.DataFrame(
+                [(stage_labels.get(k, k), v) for k, v in migration_stats["stages"].items()],
+                columns=["ステージ", "秒"],
+            ),
+            use_container_width=True,
+        )
+
+    # 実行履歴を記録した場合、チャンクごとの内訳を表示
+    if migration_stats.get("chunks"):
+        _render_chunk_breakdown(migration_stats["chunks"])
+
+    # チャンクサイズを自動調整した場合、選択されたチャンクサイズの推移を表示
+    if success and migration_stats.get("chunk_sizes"):
+        st.write("選択されたチャンクサイズの推移 (行):")
+        st.line_chart(pd.DataFrame({"チャンクサイズ": migration_stats["chunk_sizes"]}))
+
+    # 並列移行の場合、完了したキー範囲ごとの結果を表示
+    if migration_stats.get("completed_ranges"):
+        st.write("完了したキー範囲:")
+        st.dataframe(
+            pd.DataFrame(migration_stats["completed_ranges"]).rename(columns={
+                "range_index": "範囲No.", "range_start": "開始キー (含む)", "range_end": "終了キー (含まない)",
+                "rows": "行数", "seconds": "所要時間 (秒)",
+            }),
+            use_container_width=True,
+        )
+
 
 def render_data_migration_ui():
     """
@@ -70,29 +226,301 @@ def render_data_migration_ui():
     else:
         st.write("なし")
 
-    # データ移行時のチャンクサイズ入力
-    chunk_size = st.number_input(
-        "一度に処理する行数 (チャンクサイズ)",
-        min_value=100, max_value=10000, value=1000, step=100,
-        key="data_migration_ui_chunk_size", # ユニークキー
-        help="データ移行時に一度に読み書きする行数を指定します。メモリ使用量に影響します。"
+    # データ移行時のチャンクサイズと並列ワーカー数の入力
+    chunk_col, workers_col = st.columns(2)
+    with chunk_col:
+        chunk_size = st.number_input(
+            "一度に処理する行数 (チャンクサイズ)",
+            min_value=100, max_value=10000, value=1000, step=100,
+            key="data_migration_ui_chunk_size", # ユニークキー
+            help="データ移行時に一度に読み書きする行数を指定します。メモリ使用量に影響します。"
+        )
+    with workers_col:
+        workers = st.number_input(
+            "並列ワーカー数",
+            min_value=1, max_value=16, value=1, step=1,
+            key="data_migration_ui_workers", # ユニークキー
+            help="2以上を指定すると、キーカラムの値域を分割して範囲ごとに並列で移行します。SQLiteターゲットへの書き込みは直列化されます。"
+        )
+
+    # チャンクサイズの自動調整 (実測したチャンクのバイト数とスループットから次のチャンクサイズを決定)
+    adaptive_chunksize = st.checkbox(
+        "チャンクサイズを自動調整する",
+        value=False,
+        key="data_migration_ui_adaptive_chunksize", # ユニークキー
+        help="チャンクごとにバイト数・行/秒・所要時間を計測し、メモリ予算と目標所要時間に収まる範囲で、目標スループットに向けてチャンクサイズを調整します。"
+             "上記のチャンクサイズは初期値になります。メモリ予算を有効にするため、サーバーサイドカーソルで読み込みます。"
+    )
+    adaptive_options = {}
+    if adaptive_chunksize:
+        budget_col, seconds_col, throughput_col = st.columns(3)
+        with budget_col:
+            chunk_memory_budget_mb = st.number_input(
+                "チャンクのメモリ予算 (MB)",
+                min_value=1, max_value=65536, value=256, step=16,
+                key="data_migration_ui_chunk_memory_budget_mb", # ユニークキー
+                help="メモリ上に同時に保持するチャンク全体の上限です。並列ワーカー数とパイプラインのキュー深さに応じて按分されます。"
+            )
+        with seconds_col:
+            target_chunk_seconds = st.number_input(
+                "1チャンクの目標所要時間 (秒)",
+                min_value=0.1, max_value=60.0, value=1.0, step=0.1,
+                key="data_migration_ui_target_chunk_seconds", # ユニークキー
+                help="1チャンクの読み込み〜書き込みにかかる時間の上限の目安です。大きくするほどチャンクサイズの上限が大きくなります。"
+            )
+        with throughput_col:
+            target_rows_per_second = st.number_input(
+                "目標スループット (行/秒、0は指定なし)",
+                min_value=0, max_value=10_000_000, value=0, step=1000,
+                key="data_migration_ui_target_rows_per_second", # ユニークキー
+                help="実測のスループットがこの値に達するまでチャンクサイズを大きくし、達した後はそれ以上大きくしません。"
+                     "0の場合はメモリ予算と目標所要時間の上限までチャンクサイズを大きくします。"
+            )
+        adaptive_options = {
+            "adaptive_chunksize": True,
+            "chunk_memory_budget_mb": chunk_memory_budget_mb,
+            "target_chunk_seconds": target_chunk_seconds,
+            "target_rows_per_second": target_rows_per_second or None,
+        }
+
+    # 書き込み方式の選択
+    write_method_labels = {
+        "auto": "自動 (PostgreSQLはCOPY、それ以外はINSERT)",
+        "copy": "COPY ... FROM STDIN (PostgreSQLのみ)",
+        "insert": "INSERT (to_sql)",
+        "upsert": "UPSERT (INSERT ... ON CONFLICT DO UPDATE)",
+    }
+    write_method = st.selectbox(
+        "書き込み方式",
+        options=list(WRITE_METHODS),
+        format_func=lambda m: write_method_labels.get(m, m),
+        key="data_migration_ui_write_method", # ユニークキー
+        help="COPYはPostgreSQLターゲットへの大量データの書き込みが高速です。SQLiteターゲットではCOPYの代わりにINSERTが使用されます。"
+             "UPSERTはターゲットの主キー・一意制約で既存行を更新するため、再実行しても重複しません。"
+    )
+
+    # ソース読み込み方式の選択
+    stream_results = st.checkbox(
+        "サーバーサイドカーソルで読み込む (大規模テーブル向け)",
+        value=False,
+        key="data_migration_ui_stream_results", # ユニークキー
+        help="ソーステーブルを名前付きカーソルでチャンクごとに取得し、テーブル全体をメモリに読み込まないようにします。"
+    )
+
+    # データエンジンの選択 (チャンクのメモリ上の表現)
+    data_engine_labels = {
+        "pandas": "pandas (DataFrame)",
+        "arrow": "Arrow (RecordBatch)",
+    }
+    data_engine = st.selectbox(
+        "データエンジン",
+        options=list(DATA_ENGINES),
+        format_func=lambda e: data_engine_labels.get(e, e),
+        key="data_migration_ui_data_engine", # ユニークキー
+        help="Arrowは読み込んだ行をチャンクごとにArrow形式に変換して保持し、書き込み (PostgreSQLのCOPY用のCSV生成など) をArrowのバッファから行います。"
+             "ソースの読み込みはドライバー経由のため、読み込み側の速度はpandasと同程度です。"
+             "ターゲットテーブルが既に存在している必要があります。"
+    )
+
+    # 型変換プラン (ソース・ターゲットのカラムの型から、チャンクの型を移行開始時に1度だけ決定)
+    type_conversion = st.checkbox(
+        "カラムの型に基づいて変換する",
+        value=False,
+        key="data_migration_ui_type_conversion", # ユニークキー
+        help="ソースとターゲットのカラムの型から変換方法を移行開始時に決定し、チャンクごとの型推論を省きます。"
+             "NULLを含む整数カラムが小数にならず、bigintの桁落ちを防止できます。"
+    )
+
+    # 読み込み/書き込みのパイプライン化 (キュー深さ0で無効)
+    pipeline_depth = st.number_input(
+        "パイプラインのキュー深さ (0で無効)",
+        min_value=0, max_value=32, value=0, step=1,
+        key="data_migration_ui_pipeline_depth", # ユニークキー
+        help="1以上を指定すると、読み込みと書き込みを別スレッドで並行実行します。メモリ上に保持するチャンク数の上限になります。"
+    )
+
+    # メモリ予算を超えたチャンクのディスクへの退避 (0で無効)
+    spill_memory_budget_mb = st.number_input(
+        "未書き込みチャンクのメモリ予算 (MB、0で無効)",
+        min_value=0, max_value=65536, value=0, step=64,
+        key="data_migration_ui_spill_memory_budget_mb", # ユニークキー
+        help="1以上を指定すると、読み込みと書き込みを別スレッドで実行し、書き込み待ちのチャンクが予算を超えた分を"
+             "圧縮したParquetファイルとして一時ディレクトリに退避します。ターゲットが遅い場合もソースの読み込みを先に完了できます。"
+             "指定した場合、パイプラインのキュー深さによる制限は行いません。"
+    )
+
+    # ロードモードの選択 (追記 / ステージングテーブル経由の全件入れ替え)
+    load_mode_labels = {
+        "append": "追記",
+        "refresh": "リフレッシュ (ステージングテーブルにロードして入れ替え、PostgreSQLのみ)",
+    }
+    load_mode = st.selectbox(
+        "ロードモード",
+        options=list(LOAD_MODES),
+        format_func=lambda m: load_mode_labels.get(m, m),
+        key="data_migration_ui_load_mode", # ユニークキー
+        help="リフレッシュはUNLOGGEDのステージングテーブルに全件をロードし、インデックスを作成した後、1つのトランザクションでターゲットと入れ替えます。"
+             "失敗してもターゲットは変更されず、参照側からは旧データか新データのどちらかのみが見えます。"
+    )
+
+    # チェックポイントの記録 (中断された移行を途中から再開できるようにする)
+    checkpoint = st.checkbox(
+        "チェックポイントを記録する (中断時に再開可能にする)",
+        value=False,
+        key="data_migration_ui_checkpoint", # ユニークキー
+        help="キー順に読み込み、チャンクのコミットごとに最終キーと行数をメタデータDBに記録します。キーカラムはマッピングに含まれている必要があります。"
+             "キーカラムは主キーまたは一意制約 (NULLなし) で、ターゲットにソースのキーの範囲の行がない場合のみ使用できます。"
     )
 
-    # 「データ移行実行」ボタン
-    if st.button("データ移行実行", disabled=not ready_for_migration, type="primary", key="data_migration_ui_execute_button"):
-        with st.spinner("データ移行を実行中..."): # 処理中にスピナーを表示
-            success, message = migrate_data(
-                st.session_state.source_engine,
-                st.session_state.target_engine,
-                st.session_state.source_selected_table,
-                st.session_state.target_selected_table,
-                st.session_state.column_map,
-                chunksize=chunk_size,
+    # 実行履歴の記録 (チャンクごとの読み込み・変換・書き込みの所要時間を含む)
+    record_history = st.checkbox(
+        "実行履歴を記録する",
+        value=True,
+        key="data_migration_ui_record_history", # ユニークキー
+        help="移行全体とチャンクごとの所要時間・行数・メモリ使用量をメタデータDBに記録し、下の「実行履歴」で過去の実行と比較できるようにします。"
+    )
+
+    # 並列移行の範囲分割・チェックポイントに使用するキーカラムの選択 (未選択の場合は主キーを使用)
+    key_column = None
+    if workers > 1 or checkpoint:
+        source_column_names = [col["name"] for col in st.session_state.get("source_columns", [])]
+        key_column = st.selectbox(
+            "範囲分割・チェックポイントに使用するキーカラム",
+            options=[""] + source_column_names,
+            format_func=lambda c: c if c else "主キーを使用",
+            key="data_migration_ui_key_column", # ユニークキー
+            help="並列移行では整数型または日時型、チェックポイントではNULLを含まないカラムを指定してください。"
+        ) or None
+
+    # 差分移行 (保存済みマッピングにウォーターマークカラムが設定されている場合のみ)
+    watermark_options = {}
+    current_mapping_name = st.session_state.get("current_mapping_name")
+    if current_mapping_name and st.session_state.get("current_watermark_column"):
+        saved_config, _ = load_column_mapping(st.session_state.metadata_engine, current_mapping_name)
+        if saved_config and saved_config.get("watermark_column"):
+            watermark_value = saved_config.get("watermark_value")
+            incremental = st.checkbox(
+                f"差分移行 ({saved_config['watermark_column']} > {watermark_value if watermark_value is not None else '(初回は全件)'})",
+                value=True,
+                key="data_migration_ui_incremental", # ユニークキー
+                help=f"マッピング '{current_mapping_name}' に記録されたウォーターマークより後の行のみを移行し、移行後に新しいウォーターマークを保存します。"
             )
-        if success:
-            st.success(message)
-        else:
-            st.error(message)
+            if incremental:
+                watermark_null_labels = {
+                    "exclude": "移行しない",
+                    "include": "毎回移行する (UPSERT推奨)",
+                }
+                watermark_nulls = st.selectbox(
+                    f"{saved_config['watermark_column']} が NULL の行",
+                    options=list(WATERMARK_NULL_POLICIES),
+                    format_func=lambda p: watermark_null_labels.get(p, p),
+                    key="data_migration_ui_watermark_nulls", # ユニークキー
+                    help="ウォーターマークカラムが NULL の行は前回のウォーターマークと比較できないため、扱いを指定します。"
+                         "NULL の値は新しいウォーターマークには使用されません。"
+                )
+                watermark_options = {
+                    "watermark_column": saved_config["watermark_column"],
+                    "watermark_value": watermark_value,
+                    "watermark_nulls": watermark_nulls,
+                    "mapping_name": current_mapping_name,
+                }
+
+    # migrate_data に渡す共通のオプション (通常実行・再開で共用)
+    migration_args = (
+        st.session_state.get("source_engine"),
+        st.session_state.get("target_engine"),
+        st.session_state.get("source_selected_table"),
+        st.session_state.get("target_selected_table"),
+        st.session_state.column_map,
+    )
+    migration_options = {
+        "chunksize": chunk_size,
+        "write_method": write_method,
+        "stream_results": stream_results,
+        "data_engine": data_engine,
+        "type_conversion": type_conversion,
+        "load_mode": load_mode,
+        "workers": workers,
+        "pipeline_depth": pipeline_depth,
+        "spill_memory_budget_mb": spill_memory_budget_mb or None,
+        "metadata_engine": st.session_state.metadata_engine,
+        "record_history": record_history,
+        "mapping_name": current_mapping_name, # 実行履歴・ウォーターマークの保存先
+        **adaptive_options,
+        **watermark_options,
+    }
+
+    # 「データ移行実行」ボタン (この画面で実行) と「バックグラウンドで実行」ボタン (ジョブとして実行)
+    execute_col, background_col = st.columns(2)
+    with execute_col:
+        execute = st.button("データ移行実行", disabled=not ready_for_migration, type="primary", key="data_migration_ui_execute_button")
+    with background_col:
+        run_in_background = st.button(
+            "バックグラウンドで実行",
+            disabled=not ready_for_migration,
+            key="data_migration_ui_background_button",
+            help="画面の操作・再読み込みの影響を受けないワーカーでデータ移行を実行します。進捗の確認とキャンセルは「バックグラウンドジョブ」で行えます。"
+        )
+    if run_in_background:
+        job_id = get_job_manager().submit_migration(
+            current_mapping_name or f"{st.session_state.source_selected_table} → {st.session_state.target_selected_table}",
+            *migration_args,
+            key_column=key_column,
+            checkpoint=checkpoint,
+            **migration_options,
+        )
+        st.success(f"データ移行をバックグラウンドジョブとして開始しました (ジョブID: {job_id})。")
+    if execute:
+        migration_stats = {} # 移行結果の詳細 (完了したキー範囲など) を受け取る辞書
+        # 処理中は進捗 (行数・推定総行数・行/秒・残り時間) とスループットの推移を表示
+        success, message = migrate_data(
+            *migration_args,
+            key_column=key_column,
+            checkpoint=checkpoint,
+            progress_callback=_make_progress_callback(),
+            stats=migration_stats,
+            **migration_options,
+        )
+        _render_migration_result(success, message, migration_stats)
+
+    # --- 中断された移行の再開 ---
+    if ready_for_migration:
+        resumable_runs = get_resumable_migration_runs(
+            st.session_state.metadata_engine,
+            st.session_state.source_selected_table,
+            st.session_state.target_selected_table,
+        )
+        if resumable_runs:
+            st.markdown("##### 中断された移行の再開")
+            runs_by_id = {run["run_id"]: run for run in resumable_runs}
+            selected_run_id = st.selectbox(
+                "再開する移行",
+                options=list(runs_by_id),
+                format_func=lambda run_id: (
+                    f"{runs_by_id[run_id]['updated_at']} - {runs_by_id[run_id]['rows_migrated']}行移行済み"
+                    f" (完了範囲 {runs_by_id[run_id]['completed_ranges']}/{runs_by_id[run_id]['ranges']}, 実行ID: {run_id})"
+                ),
+                key="data_migration_ui_resume_run_select", # ユニークキー
+                help="最後のチェックポイント以降の行のみを移行します。チェックポイント未記録のまま書き込まれた行は再開前に削除されます。"
+            )
+            if st.button("選択した移行を再開", key="data_migration_ui_resume_button"):
+                migration_stats = {}
+                success, message = migrate_data(
+                    *migration_args,
+                    resume_run_id=selected_run_id,
+                    progress_callback=_make_progress_callback(),
+                    stats=migration_stats,
+                    **migration_options,
+                )
+                _render_migration_result(success, message, migration_stats)
+
+    # --- 実行履歴 ---
+    if ready_for_migration:
+        _render_migration_history(
+            st.session_state.metadata_engine,
+            st.session_state.source_selected_table,
+            st.session_state.target_selected_table,
+        )
 
     st.markdown("---") # 区切り線
 
@@ -1,6 +1,83 @@
+import bisect # テーブル名の前方一致検索に使用
 import streamlit as st
 import pandas as pd # st.dataframe を使用するためにインポート
-from db_utils import get_table_names, get_table_columns # DB操作ユーティリティ関数
+from db_utils import ( # DB操作ユーティリティ関数
+    get_table_names,
+    get_table_columns,
+    invalidate_catalog_cache, # カタログキャッシュの破棄
+    load_table_names_in_background, # テーブル一覧のバックグラウンドでの取得
+    prefetch_schema_catalog,  # スキーマ全体のカタログの一括取得
+)
+
+# テーブル選択の1ページあたりの表示件数
+TABLE_PICKER_PAGE_SIZE = 50
+
+
+class _TableNameIndex:
+    """テーブル名・コメントの検索用インデックスです。
+
+    - 物理名からコメントを O(1) で引くための辞書
+    - 前方一致検索用の、小文字化した物理名のソート済みリスト (bisect で検索)
+    - 部分一致検索用の、小文字化した「物理名 + コメント」のリスト
+    を、テーブル一覧の取得時に1度だけ構築します。
+    """
+
+    def __init__(self, tables_info_list):
+        self.names = [table_info["name"] for table_info in tables_info_list]
+        self.comments = {table_info["name"]: table_info.get("comment") or "" for table_info in tables_info_list}
+        self._sorted_keys = sorted((name.lower(), name) for name in self.names)
+        self._haystacks = [(f"{name}\t{self.comments[name]}".lower(), name) for name in self.names]
+
+    def search(self, query):
+        """物理名の前方一致、物理名・コメントの部分一致の順にテーブル名を返します (重複なし)。
+
+        Args:
+            query (str): 検索文字列。空の場合は全テーブルを返します。
+
+        Returns:
+            list: 一致したテーブルの物理名のリスト。
+        """
+        query = (query or "").strip().lower()
+        if not query:
+            return self.names
+        start = bisect.bisect_left(self._sorted_keys, (query,))
+        prefix_matches = []
+        for key, name in self._sorted_keys[start:]:
+            if not key.startswith(query):
+                break
+            prefix_matches.append(name)
+        matched = set(prefix_matches)
+        substring_matches = [name for haystack, name in self._haystacks if query in haystack and name not in matched]
+        return prefix_matches + substring_matches
+
+    def format_name(self, physical_name):
+        """selectbox の表示名 (物理名 (コメント)) を返します。"""
+        if not physical_name: # 空の選択肢の場合
+            return "選択してください"
+        comment = self.comments.get(physical_name)
+        return f"{physical_name} ({comment})" if comment else physical_name
+
+
+def _get_table_name_index(tables_key, tables_info_list):
+    """テーブル一覧に対応する検索用インデックスを返します。テーブル一覧が変わった場合のみ作り直します。"""
+    index_key = f"{tables_key}_name_index"
+    cached = st.session_state.get(index_key)
+    if cached is None or cached[0] is not tables_info_list:
+        cached = (tables_info_list, _TableNameIndex(tables_info_list))
+        st.session_state[index_key] = cached
+    return cached[1]
+
+
+@st.fragment(run_every=1)
+def _render_table_names_loading(future_key: str, db_label: str):
+    """バックグラウンドでのテーブル一覧の読み込み中の表示です。
+    1秒ごとにこの部分のみを再実行し、読み込みが完了したらアプリ全体を再実行して結果を反映します。
+    """
+    tables_future = st.session_state.get(future_key)
+    if tables_future is None or tables_future.done():
+        st.rerun()
+    st.info(f"⏳ {db_label} のテーブル一覧を読み込み中です...")
+
 
 def display_db_info(engine, tables_key: str, selected_table_key: str, columns_key: str, db_label: str):
     """
@@ -15,6 +92,9 @@ def display_db_info(engine, tables_key: str, selected_table_key: str, columns_ke
         db_label (str): UIに表示するデータベースのラベル (例: "接続1 (ソース)")。
     """
     schema_name_key = f"{tables_key}_schema_name"
+    tables_future_key = f"{tables_key}_future" # バックグラウンドでのテーブル一覧の読み込み (Future)
+    tables_loaded_key = f"{tables_key}_loaded" # テーブル一覧の読み込みが完了しているか (0件の場合も含む)
+    tables_error_key = f"{tables_key}_load_error" # テーブル一覧の読み込みエラー
     if engine: # エンジンがNoneでない（接続が確立されている）場合のみ処理
         st.subheader(f"{db_label} 情報") # 例: "接続1 (ソース) 情報"
 
@@ -36,48 +116,110 @@ def display_db_info(engine, tables_key: str, selected_table_key: str, columns_ke
         # スキーマ名をセッションに保存
         st.session_state[schema_name_key] = schema_to_use
 
-        # テーブル情報リストが空で、かつエンジンが存在する場合、テーブル情報を再取得試行
-        if not tables_info_list and engine:
+        # カタログ (テーブル一覧・カラム情報) は全セッション共有のキャッシュから取得されるため、
+        # テーブルの追加やカラム変更を反映したい場合はキャッシュを破棄して再取得する
+        catalog_col1, catalog_col2 = st.columns(2)
+        with catalog_col1:
+            if st.button("🔄 カタログ再読込", key=f"db_info_ui_{db_label}_refresh_catalog_button"):
+                invalidate_catalog_cache(engine, schema_name=schema_to_use)
+                st.session_state[tables_future_key] = load_table_names_in_background(engine, schema_name=schema_to_use)
+        with catalog_col2:
+            # スキーマ全体のカラム情報を1回のクエリで先読みし、以降のテーブル選択・マッピング画面ではDBに問い合わせない
+            if st.button(
+                "📥 スキーマ全体を先読み",
+                key=f"db_info_ui_{db_label}_prefetch_catalog_button",
+                help="スキーマ内の全テーブルのカラム・型・コメントを1回のクエリで取得し、キャッシュします。テーブル数が多いスキーマ向け。",
+            ):
+                try:
+                    prefetch_summary = prefetch_schema_catalog(engine, schema_name=schema_to_use)
+                    st.success(
+                        f"{prefetch_summary['tables']} テーブル・{prefetch_summary['columns']} カラムを先読みしました "
+                        f"({prefetch_summary['seconds']:.2f}秒)。"
+                    )
+                    # 先読みした結果からテーブル一覧を取得 (キャッシュから返されるためDBへの問い合わせは発生しない)
+                    tables_info_list = get_table_names(engine, schema_name=schema_to_use)
+                    st.session_state[tables_key] = tables_info_list
+                    st.session_state.pop(tables_future_key, None)
+                except RuntimeError as e:
+                    st.error(f"{db_label} のカタログの先読みに失敗: {e}")
+
+        # バックグラウンドでのテーブル一覧の読み込みが完了していれば、結果をセッション状態に反映
+        tables_future = st.session_state.get(tables_future_key)
+        if tables_future is not None and tables_future.done():
+            del st.session_state[tables_future_key]
+            st.session_state[tables_loaded_key] = True
             try:
-                tables_info_list = get_table_names(engine, schema_name=schema_to_use) # 動的に取得したスキーマ名を使用
-                st.session_state[tables_key] = tables_info_list # 取得したリストをセッション状態に保存
+                tables_info_list = tables_future.result()
+                st.session_state[tables_error_key] = None
             except RuntimeError as e:
-                st.error(f"{db_label} のテーブル一覧取得に失敗: {e}")
-                st.session_state[tables_key] = []  # エラー時は空リストを設定
-                tables_info_list = [] # ローカル変数も更新
+                st.session_state[tables_error_key] = str(e)
+                tables_info_list = [] # エラー時は空リストを設定
+            st.session_state[tables_key] = tables_info_list # 取得したリストをセッション状態に保存
+            tables_future = None
+
+        # テーブル情報リストが空で、まだ読み込んでいない場合、テーブル情報の取得をバックグラウンドで開始
+        if not tables_info_list and tables_future is None and not st.session_state.get(tables_loaded_key):
+            tables_future = load_table_names_in_background(engine, schema_name=schema_to_use) # 動的に取得したスキーマ名を使用
+            st.session_state[tables_future_key] = tables_future
+
+        if tables_future is not None: # 読み込み中の場合 (完了したら自動で再描画される)
+            _render_table_names_loading(tables_future_key, db_label)
+        elif st.session_state.get(tables_error_key):
+            st.error(f"{db_label} のテーブル一覧取得に失敗: {st.session_state.get(tables_error_key)}")
 
         if tables_info_list: # 表示するテーブル情報がある場合
-            # 物理名のリストを作成 (selectboxのoptions用)
-            physical_table_names = [table_info["name"] for table_info in tables_info_list]
-
-            # format_func を定義
-            def format_table_name(physical_name):
-                if not physical_name: # 空の選択肢の場合
-                    return "選択してください"
-                # tables_info_list から該当するテーブル情報を検索
-                table_info = next((t for t in tables_info_list if t["name"] == physical_name), None)
-                if table_info:
-                    comment = table_info.get("comment")
-                    return f"{physical_name} ({comment})" if comment else physical_name
-                return physical_name # 見つからなければ物理名のみ
+            # テーブル名・コメントの検索用インデックス (テーブル数が多くても表示名の整形やコメントの参照を O(1) で行う)
+            table_index = _get_table_name_index(tables_key, tables_info_list)
+
+            # 検索ボックス (物理名の前方一致 → 物理名・コメントの部分一致の順に表示)
+            search_query = st.text_input(
+                f"{db_label} テーブル検索",
+                key=f"db_info_ui_{db_label}_table_search",
+                placeholder="物理名またはコメントで絞り込み",
+            )
+            matched_table_names = table_index.search(search_query)
+
+            # 検索結果をページ単位で表示する
+            page_count = max(1, -(-len(matched_table_names) // TABLE_PICKER_PAGE_SIZE))
+            page_number = 1
+            page_key = f"db_info_ui_{db_label}_table_page"
+            if st.session_state.get(page_key, 1) > page_count:
+                st.session_state[page_key] = page_count # 検索で件数が減った場合はページ番号を範囲内に戻す
+            if page_count > 1:
+                page_number = int(st.number_input(
+                    f"ページ (全{page_count}ページ)",
+                    min_value=1,
+                    max_value=page_count,
+                    step=1,
+                    key=page_key,
+                ))
+            page_start = (page_number - 1) * TABLE_PICKER_PAGE_SIZE
+            page_table_names = matched_table_names[page_start:page_start + TABLE_PICKER_PAGE_SIZE]
+            st.caption(
+                f"{len(tables_info_list)} テーブル中 {len(matched_table_names)} 件が一致"
+                + (f" ({page_start + 1}〜{page_start + len(page_table_names)} 件目を表示)" if page_table_names else "")
+            )
 
             # 現在選択されている物理テーブル名をセッション状態から取得
             current_selected_physical_table = st.session_state.get(selected_table_key)
+            if current_selected_physical_table not in table_index.comments:
+                current_selected_physical_table = None # テーブル一覧に存在しない場合は選択をリセット
+                st.session_state[selected_table_key] = None
+            # 選択中のテーブルが表示中のページにない場合も、選択が外れないよう選択肢の先頭に残す
+            if current_selected_physical_table and current_selected_physical_table not in page_table_names:
+                page_table_names = [current_selected_physical_table] + page_table_names
 
             # selectboxのデフォルト選択インデックスを計算
             select_idx = 0 # デフォルトは未選択 (optionsの先頭 "")
-            if current_selected_physical_table and current_selected_physical_table in physical_table_names:
-                try:
-                    select_idx = physical_table_names.index(current_selected_physical_table) + 1 # +1 は先頭の未選択オプション分
-                except ValueError:
-                    st.session_state[selected_table_key] = None # 選択をリセット
+            if current_selected_physical_table:
+                select_idx = page_table_names.index(current_selected_physical_table) + 1 # +1 は先頭の未選択オプション分
 
             # テーブル選択のselectbox
             selected_physical_table = st.selectbox(
                 f"{db_label} テーブル一覧",
-                options=[""] + physical_table_names,  # 先頭に空の選択肢を追加
+                options=[""] + page_table_names,  # 先頭に空の選択肢を追加
                 index=select_idx,
-                format_func=format_table_name, # 表示名整形関数
+                format_func=table_index.format_name, # 表示名整形関数
                 key=f"db_info_ui_{db_label}_table_select", # ユニークキー
             )
             # 選択された物理テーブル名をセッション状態に保存
@@ -134,7 +276,7 @@ def display_db_info(engine, tables_key: str, selected_table_key: str, columns_ke
                 # テーブルが選択されていない場合はカラム情報をクリア
                 st.session_state[columns_key] = []
         else: # 表示するテーブルがない場合
-            if engine: # エンジンはあるがテーブルが0件の場合
+            if tables_future is None and not st.session_state.get(tables_error_key): # 読み込み済みでテーブルが0件の場合
                 st.info(f"{db_label} にテーブルが見つかりません。")
             # エンジン自体がない場合は、この関数の冒頭の if engine: でブロックされているはず
     else: # エンジンがNoneの場合 (未接続)
@@ -0,0 +1,87 @@
+import streamlit as st
+import pandas as pd
+from jobs import get_job_manager # プロセス内で共有のジョブマネージャー
+
+# ジョブ一覧の自動更新の間隔 (秒)
+JOBS_REFRESH_SECONDS = 2
+
+_JOB_STATUS_LABELS = {
+    "queued": "待機中", "running": "実行中", "success": "成功", "failed": "失敗", "cancelled": "キャンセル",
+}
+
+
+def _format_job_progress(job):
+    """ジョブの進捗を「行数 (進捗率) - 行/秒 - 残り時間」の形式の文字列に変換します。"""
+    progress = job["progress"]
+    if not progress:
+        return ""
+    text = f"{progress['rows']:,}行"
+    if progress["fraction"] is not None:
+        text += f" ({progress['fraction']:.0%})"
+    if job["status"] == "running":
+        text += f" - {progress['rows_per_sec']:,.0f}行/秒"
+        if progress["eta_seconds"] is not None:
+            text += f" - 残り約{progress['eta_seconds']:,.0f}秒"
+    return text
+
+
+@st.fragment(run_every=JOBS_REFRESH_SECONDS)
+def _render_jobs_panel():
+    """ジョブの一覧と、実行中のジョブの進捗・キャンセルボタンを表示します (一定間隔で自動更新)。"""
+    job_manager = get_job_manager()
+    jobs = job_manager.list_jobs()
+    if not jobs:
+        st.info("バックグラウンドジョブはありません。「データ移行」の「バックグラウンドで実行」でジョブを開始できます。")
+        return
+
+    # 実行中・待機中のジョブ: 進捗とキャンセルボタン
+    for job in jobs:
+        if job["status"] not in ("queued", "running"):
+            continue
+        progress_col, cancel_col = st.columns([5, 1])
+        with progress_col:
+            status_text = "キャンセル中..." if job["cancel_requested"] else _JOB_STATUS_LABELS[job["status"]]
+            fraction = (job["progress"] or {}).get("fraction") or 0.0
+            st.progress(
+                min(fraction, 1.0),
+                text=f"{job['name']} ({job['source_table']} → {job['target_table']}): {status_text} {_format_job_progress(job)}",
+            )
+        with cancel_col:
+            if st.button("キャンセル", disabled=job["cancel_requested"], key=f"jobs_ui_cancel_{job['job_id']}"):
+                success, message = job_manager.cancel(job["job_id"])
+                if success:
+                    st.toast(message)
+                else:
+                    st.warning(message)
+
+    st.dataframe(
+        pd.DataFrame([
+            {
+                "ジョブID": job["job_id"],
+                "名前": job["name"],
+                "ソーステーブル": job["source_table"],
+                "ターゲットテーブル": job["target_table"],
+                "状態": _JOB_STATUS_LABELS.get(job["status"], job["status"]),
+                "投入日時": job["submitted_at"],
+                "開始日時": job["started_at"],
+                "終了日時": job["finished_at"],
+                "進捗": _format_job_progress(job),
+                "メッセージ": job["message"],
+            }
+            for job in jobs
+        ]),
+        use_container_width=True,
+        hide_index=True,
+    )
+    if st.button("終了済みのジョブを一覧から削除", key="jobs_ui_clear_button"):
+        job_manager.clear_finished_jobs()
+        st.rerun(scope="fragment")
+
+
+def render_jobs_ui():
+    """
+    バックグラウンドで実行中・終了済みのデータ移行ジョブを一覧表示するUIコンポーネントを描画します。
+    ジョブはプロセス内で共有されるため、他のセッションから開始したジョブも表示されます。
+    """
+    st.header("バックグラウンドジョブ") # セクションヘッダー
+    _render_jobs_panel()
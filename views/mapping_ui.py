@@ -126,6 +126,20 @@ def render_mapping_ui():
         )
         st.session_state.current_mapping_name = current_mapping_name_input # 入力値をセッションに保存
 
+        # 差分移行用のウォーターマークカラム (任意)
+        watermark_options = [""] + source_cols
+        current_watermark_column = st.session_state.get("current_watermark_column", "")
+        if current_watermark_column and current_watermark_column not in watermark_options:
+            watermark_options.append(current_watermark_column) # 読み込んだ設定のカラムが現在のソースにない場合も表示
+        st.session_state.current_watermark_column = st.selectbox(
+            "ウォーターマークカラム (差分移行用、任意)",
+            options=watermark_options,
+            index=watermark_options.index(current_watermark_column) if current_watermark_column in watermark_options else 0,
+            format_func=lambda c: c if c else "なし (常に全件移行)",
+            key="mapping_ui_watermark_column_select",
+            help="updated_at や単調増加するIDなどを指定すると、保存したマッピングでの移行時に前回のウォーターマークより後の行のみを移行できます。"
+        )
+
         # 「現在のマッピングを保存」ボタン
         if st.button("現在のマッピングを保存", key="mapping_ui_save_button"):
             # バリデーションチェック
@@ -149,6 +163,7 @@ def render_mapping_ui():
                     st.session_state.source_selected_table,
                     st.session_state.get("target_selected_table", ""), # ターゲットテーブルは任意なので空文字許容
                     st.session_state.column_map,
+                    watermark_column=st.session_state.get("current_watermark_column") or None,
                 )
                 if success:
                     st.success(message)
@@ -176,6 +191,7 @@ def render_mapping_ui():
                     if config_details and mappings is not None: # mappingsは空の辞書である可能性があるので is not None でチェック
                         st.session_state.current_mapping_name = config_details["name"]
                         st.session_state.column_map = mappings
+                        st.session_state.current_watermark_column = config_details.get("watermark_column") or ""
                         st.info(f"マッピング '{selected_map_to_load}' を読み込みました。")
                         st.info(f"保存時の情報 - ソーステーブル: {config_details['source_table']}, ターゲットテーブル: {config_details['target_table'] or 'N/A'}")
                         # TODO: 読み込んだマッピングのDB情報やテーブル名に基づいて、現在の接続やテーブル選択を自動で更新する機能も検討可能
@@ -193,6 +209,7 @@ def render_mapping_ui():
                         if st.session_state.current_mapping_name == selected_map_to_load:
                             st.session_state.current_mapping_name = ""
                             st.session_state.column_map = {}
+                            st.session_state.current_watermark_column = ""
                         st.rerun() # UIを再描画
                     else:
                         st.error(message)
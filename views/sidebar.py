@@ -6,7 +6,9 @@ from db_utils import (
     load_connection_info,      # 追加
     update_connection_info,    # 追加
     delete_connection_info,     # 追加
-    get_connection_names       # 追加
+    get_connection_names,      # 追加
+    dispose_engine,            # 接続プールの接続の解放
+    get_engine_registry_status # 共有エンジン (接続プール) の状態表示
 )
 
 def render_sidebar():
@@ -44,7 +46,7 @@ def render_sidebar():
     if st.sidebar.button("メタデータDB接続テスト/接続", key="sidebar_connect_metadata_db_button"):
         if sqlite_path:
             try:
-                engine = get_db_engine("sqlite", {"db_path": sqlite_path})
+                engine = get_db_engine("sqlite", {"db_path": sqlite_path}, pool_options=st.session_state.get("pool_options"))
                 if engine:
                     st.session_state.metadata_engine = engine
                     create_metadata_tables_if_not_exists(st.session_state.metadata_engine)
@@ -66,6 +68,46 @@ def render_sidebar():
     else:
         st.sidebar.warning("メタデータDBに接続してください。")
 
+    # --- 接続プールの設定 ---
+    # エンジンは接続先ごとにプロセス全体で共有されるため、ここでの変更は同じ接続先に次回接続した際に全セッションへ反映される
+    with st.sidebar.expander("接続プール設定"):
+        pool_options = st.session_state.pool_options
+        pool_options["pool_size"] = st.number_input(
+            "プールサイズ", min_value=1, max_value=100, value=int(pool_options["pool_size"]), step=1,
+            key="sidebar_pool_size",
+            help="接続先ごとに常時保持する接続数です。"
+        )
+        pool_options["max_overflow"] = st.number_input(
+            "最大オーバーフロー", min_value=0, max_value=100, value=int(pool_options["max_overflow"]), step=1,
+            key="sidebar_pool_max_overflow",
+            help="プールサイズを超えて一時的に作成できる接続数です。"
+        )
+        pool_options["pool_pre_ping"] = st.checkbox(
+            "接続前に生存確認 (pre-ping)", value=bool(pool_options["pool_pre_ping"]),
+            key="sidebar_pool_pre_ping",
+            help="プールから接続を取り出す際に生存を確認し、切断された接続を自動的に作り直します。"
+        )
+        pool_options["pool_recycle"] = st.number_input(
+            "接続の再作成間隔 (秒、-1で無効)", min_value=-1, max_value=86400, value=int(pool_options["pool_recycle"]), step=60,
+            key="sidebar_pool_recycle",
+        )
+        st.session_state.pool_options = pool_options
+
+        # 他のセッションの接続先を表示・操作しないよう、このセッションのエンジンのみを対象にする
+        session_engines = [
+            st.session_state.get(engine_key) for engine_key in ("source_engine", "target_engine", "metadata_engine")
+        ]
+        session_engines = list({id(engine): engine for engine in session_engines if engine is not None}.values())
+        registry_status = get_engine_registry_status(session_engines)
+        if registry_status:
+            st.caption("このセッションのエンジン:")
+            for engine_status in registry_status:
+                st.caption(f"{engine_status['url']} — 貸し出し中: {engine_status['checked_out']} / {engine_status['status']}")
+        if session_engines and st.button("このセッションのエンジンのアイドル接続を解放", key="sidebar_pool_dispose_button"):
+            for engine in session_engines:
+                dispose_engine(engine)
+            st.success(f"{len(session_engines)}個のエンジンの接続プールを解放しました。")
+
     # --- 保存済み接続の管理 ---
     st.sidebar.subheader("保存済み接続の管理")
     metadata_engine = st.session_state.get("metadata_engine")